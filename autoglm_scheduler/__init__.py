@@ -1,15 +1,28 @@
 """AutoGLM-Scheduler: 多设备定时任务调度器"""
 
-from autoglm_scheduler.scheduler import Scheduler
+from typing import TYPE_CHECKING
+
 from autoglm_scheduler.job import Job, JobStatus, JobResult
 from autoglm_scheduler.device_pool import DevicePool, DeviceStatus
 
+if TYPE_CHECKING:
+    from autoglm_scheduler.scheduler import Scheduler
+
 __version__ = "0.1.0"
 __all__ = [
     "Scheduler",
     "Job",
-    "JobStatus", 
+    "JobStatus",
     "JobResult",
     "DevicePool",
     "DeviceStatus",
 ]
+
+
+def __getattr__(name):
+    # PEP 562：延迟导入 Scheduler，首次访问才加载 APScheduler 依赖树，
+    # 避免 --help 之类的轻量命令吃冷启动开销
+    if name == "Scheduler":
+        from autoglm_scheduler.scheduler import Scheduler
+        return Scheduler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,81 @@
+"""ADB 服务器直连客户端
+
+adb 命令行每次调用都要 fork+exec adb 二进制，再由它连接本机 5037 端口的
+adb 服务器。这里按 adb host 协议直接跟服务器通信，把一次设备查询压缩为
+一次回环 socket 读写（微秒级），跳过进程启动开销。
+
+协议：请求为 4 位十六进制长度前缀 + 命令文本；应答先回 4 字节 OKAY/FAIL，
+随后是长度前缀的数据。
+"""
+
+import socket
+from typing import Dict, Optional
+
+ADB_SERVER_ADDR = ("127.0.0.1", 5037)
+
+_CONNECT_TIMEOUT = 1.0
+
+
+class AdbError(Exception):
+    """adb 服务器返回 FAIL 时抛出"""
+
+
+def _read_exact(sock: socket.socket, n: int) -> bytes:
+    """从 socket 读满 n 字节"""
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("adb 服务器连接中断")
+        buf += chunk
+    return buf
+
+
+def _request(cmd: str) -> bytes:
+    """发送一条 host 命令并返回应答数据"""
+    with socket.create_connection(ADB_SERVER_ADDR, timeout=_CONNECT_TIMEOUT) as sock:
+        payload = cmd.encode("utf-8")
+        sock.sendall(b"%04x" % len(payload) + payload)
+
+        status = _read_exact(sock, 4)
+        length = int(_read_exact(sock, 4), 16)
+        data = _read_exact(sock, length)
+
+        if status != b"OKAY":
+            raise AdbError(data.decode("utf-8", "replace"))
+        return data
+
+
+def parse_devices_output(raw: bytes) -> Dict[str, str]:
+    """解析设备列表输出，只解码命中的两个字段
+
+    兼容协议载荷和 adb devices 的 stdout：不含制表符的行
+    （如 "List of devices attached" 表头）会被跳过。
+    """
+    snapshot = {}
+    for line in raw.splitlines():
+        dev, sep, state = line.partition(b"\t")
+        if sep:
+            snapshot[dev.decode("utf-8")] = state.strip().decode("utf-8")
+    return snapshot
+
+
+def devices() -> Dict[str, str]:
+    """查询所有设备状态
+
+    Returns:
+        {device_id: state}，state 通常为 device/offline/unauthorized
+
+    Raises:
+        OSError: adb 服务器未运行或连接失败
+        AdbError: 服务器返回错误
+    """
+    return parse_devices_output(_request("host:devices"))
+
+
+def get_state(device_id: str) -> Optional[str]:
+    """查询单个设备状态，设备不存在时返回 None"""
+    try:
+        return _request(f"host-serial:{device_id}:get-state").decode("utf-8")
+    except AdbError:
+        return None
@@ -1,38 +1,18 @@
 """命令行接口"""
 
-import os
 import click
 from rich.console import Console
 from rich.table import Table
 from dotenv import load_dotenv
 
-from autoglm_scheduler import Scheduler
+from autoglm_scheduler import Scheduler, config
+from autoglm_scheduler.device_pool import get_adb_command, query_adb_devices
 
 # 加载环境变量
 load_dotenv()
 
 console = Console()
 
-# 雷电模拟器 ADB 路径
-LDPLAYER_ADB_PATHS = [
-    r"D:\leidian\LDPlayer9\adb.exe",
-    r"C:\leidian\LDPlayer9\adb.exe",
-    r"D:\Program Files\leidian\LDPlayer9\adb.exe",
-    r"C:\Program Files\leidian\LDPlayer9\adb.exe",
-]
-
-def get_adb_command():
-    """获取可用的 ADB 命令"""
-    import shutil
-    # 先检查系统 PATH
-    if shutil.which("adb"):
-        return "adb"
-    # 再检查雷电模拟器
-    for path in LDPLAYER_ADB_PATHS:
-        if os.path.exists(path):
-            return path
-    return "adb"  # 默认
-
 
 @click.group()
 @click.option('--base-url', envvar='AUTOGLM_BASE_URL', default='http://localhost:8000/v1', help='模型API地址')
@@ -63,14 +43,9 @@ def run(ctx, task, device):
     if device:
         scheduler.add_device(device)
     else:
-        # 尝试获取已连接设备
-        import subprocess
-        adb_cmd = get_adb_command()
-        result = subprocess.run([adb_cmd, 'devices'], capture_output=True, text=True)
-        lines = result.stdout.strip().split('\n')[1:]
-        for line in lines:
-            if '\tdevice' in line:
-                dev_id = line.split('\t')[0]
+        # 尝试获取已连接设备（复用调度器的 adb 快照）
+        for dev_id, state in scheduler.list_adb_devices():
+            if state == 'device':
                 scheduler.add_device(dev_id)
                 break
     
@@ -89,46 +64,35 @@ def run(ctx, task, device):
 @click.option('--task', '-t', required=True, help='任务描述')
 @click.option('--cron', '-c', required=True, help='cron表达式')
 @click.option('--device', '-d', help='指定设备ID')
-def add(name, task, cron, device):
+@click.option('--batch', '-b', multiple=True,
+              help='adb shell 命令（可多次指定，设置后跳过模型一次性执行）')
+def add(name, task, cron, device, batch):
     """添加定时任务"""
     # 保存到配置文件
-    import json
-    config_file = os.path.expanduser('~/.autoglm_scheduler/jobs.json')
-    os.makedirs(os.path.dirname(config_file), exist_ok=True)
-    
-    jobs = []
-    if os.path.exists(config_file):
-        with open(config_file, 'r', encoding='utf-8') as f:
-            jobs = json.load(f)
-    
-    jobs.append({
+    jobs = list(config.load_jobs())
+    entry = {
         'name': name,
         'task': task,
         'cron': cron,
         'device': device,
-    })
-    
-    with open(config_file, 'w', encoding='utf-8') as f:
-        json.dump(jobs, f, ensure_ascii=False, indent=2)
-    
+    }
+    if batch:
+        entry['batch'] = [*batch]
+    jobs.append(entry)
+    config.save_jobs(jobs)
+
     console.print(f"[green]✅ 添加定时任务: {name}[/green]")
     console.print(f"   任务: {task}")
     console.print(f"   cron: {cron}")
+    if batch:
+        console.print(f"   批量命令: {len(batch)} 条")
 
 
-@main.command()
-def list():
+@main.command("list")
+def list_jobs():
     """列出所有定时任务"""
-    import json
-    config_file = os.path.expanduser('~/.autoglm_scheduler/jobs.json')
-    
-    if not os.path.exists(config_file):
-        console.print("[yellow]暂无定时任务[/yellow]")
-        return
-    
-    with open(config_file, 'r', encoding='utf-8') as f:
-        jobs = json.load(f)
-    
+    jobs = config.load_jobs()
+
     if not jobs:
         console.print("[yellow]暂无定时任务[/yellow]")
         return
@@ -155,8 +119,6 @@ def list():
 @click.pass_context
 def start(ctx, device):
     """启动调度服务"""
-    import json
-    
     scheduler = Scheduler(
         base_url=ctx.obj['base_url'],
         api_key=ctx.obj['api_key'],
@@ -168,14 +130,9 @@ def start(ctx, device):
         for d in device:
             scheduler.add_device(d)
     else:
-        # 自动检测设备
-        import subprocess
-        adb_cmd = get_adb_command()
-        result = subprocess.run([adb_cmd, 'devices'], capture_output=True, text=True)
-        lines = result.stdout.strip().split('\n')[1:]
-        for line in lines:
-            if '\tdevice' in line:
-                dev_id = line.split('\t')[0]
+        # 自动检测设备（复用调度器的 adb 快照）
+        for dev_id, state in scheduler.list_adb_devices():
+            if state == 'device':
                 scheduler.add_device(dev_id)
     
     if scheduler._device_pool.total_count == 0:
@@ -183,19 +140,8 @@ def start(ctx, device):
         console.print("[yellow]提示: 请确保雷电模拟器已启动[/yellow]")
         return
     
-    # 加载定时任务
-    config_file = os.path.expanduser('~/.autoglm_scheduler/jobs.json')
-    if os.path.exists(config_file):
-        with open(config_file, 'r', encoding='utf-8') as f:
-            jobs = json.load(f)
-        
-        for job in jobs:
-            scheduler.add_cron_job(
-                name=job['name'],
-                task=job['task'],
-                cron=job['cron'],
-                device_id=job.get('device'),
-            )
+    # 加载定时任务并监控配置文件变更（外部编辑无需重启）
+    scheduler.watch_config()
     
     console.print("[green]🚀 调度服务已启动[/green]")
     console.print(f"   设备数量: {scheduler._device_pool.total_count}")
@@ -208,22 +154,15 @@ def start(ctx, device):
 @main.command()
 def devices():
     """列出已连接的设备"""
-    import subprocess
-    adb_cmd = get_adb_command()
-    console.print(f"[dim]使用 ADB: {adb_cmd}[/dim]")
-    result = subprocess.run([adb_cmd, 'devices'], capture_output=True, text=True)
-    
+    console.print(f"[dim]使用 ADB: {get_adb_command()}[/dim]")
+
     table = Table(title="已连接设备")
     table.add_column("设备ID", style="cyan")
     table.add_column("状态", style="green")
-    
-    lines = result.stdout.strip().split('\n')[1:]
-    for line in lines:
-        if line.strip():
-            parts = line.split('\t')
-            if len(parts) >= 2:
-                table.add_row(parts[0], parts[1])
-    
+
+    for dev_id, state in query_adb_devices().items():
+        table.add_row(dev_id, state)
+
     console.print(table)
 
 
@@ -231,25 +170,16 @@ def devices():
 @click.argument('name')
 def remove(name):
     """移除定时任务"""
-    import json
-    config_file = os.path.expanduser('~/.autoglm_scheduler/jobs.json')
-    
-    if not os.path.exists(config_file):
-        console.print("[red]任务不存在[/red]")
-        return
-    
-    with open(config_file, 'r', encoding='utf-8') as f:
-        jobs = json.load(f)
-    
+    jobs = config.load_jobs()
     new_jobs = [j for j in jobs if j['name'] != name]
-    
+
     if len(new_jobs) == len(jobs):
         console.print(f"[red]任务 '{name}' 不存在[/red]")
         return
-    
-    with open(config_file, 'w', encoding='utf-8') as f:
-        json.dump(new_jobs, f, ensure_ascii=False, indent=2)
-    
+
+    # 只有集合实际变化时才写盘
+    config.save_jobs(new_jobs)
+
     console.print(f"[green]✅ 已移除任务: {name}[/green]")
 
 
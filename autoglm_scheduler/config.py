@@ -0,0 +1,73 @@
+"""定时任务配置文件管理
+
+jobs.json 的读写入口。读取带 mtime 缓存：文件未修改时直接返回缓存数据，
+避免每次 CLI 调用都重新打开和解析。
+"""
+
+import json
+import os
+from typing import List, Tuple
+
+try:
+    import orjson  # C 实现的编解码，大配置下比标准库快数倍
+except ImportError:
+    orjson = None
+
+# 默认配置文件路径
+DEFAULT_CONFIG_FILE = os.path.expanduser('~/.autoglm_scheduler/jobs.json')
+
+# path -> (mtime_ns, data) 缓存
+_cache: dict = {}
+
+
+def load_jobs(path: str = DEFAULT_CONFIG_FILE) -> List[dict]:
+    """
+    读取定时任务配置（带 mtime 缓存）
+
+    Args:
+        path: 配置文件路径
+
+    Returns:
+        任务配置列表，文件不存在时返回空列表
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return []
+
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == st.st_mtime_ns:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        raw = f.read()
+    jobs = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+    _cache[path] = (st.st_mtime_ns, jobs)
+    return jobs
+
+
+def save_jobs(jobs: List[dict], path: str = DEFAULT_CONFIG_FILE) -> None:
+    """
+    保存定时任务配置（先写临时文件再 os.replace，写入原子化）
+
+    Args:
+        jobs: 任务配置列表
+        path: 配置文件路径
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if orjson is not None:
+        data = orjson.dumps(jobs, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(jobs, ensure_ascii=False, indent=2).encode('utf-8')
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+    try:
+        _cache[path] = (os.stat(path).st_mtime_ns, jobs)
+    except OSError:
+        _cache.pop(path, None)
@@ -1,13 +1,76 @@
 """设备池管理模块"""
 
+import os
+import shutil
 import subprocess
 import threading
+import time
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Optional, Dict, List
 from concurrent.futures import ThreadPoolExecutor, Future
 
+from autoglm_scheduler import adb_client
+from autoglm_scheduler.log import logger
+
+# adb 快照的有效期（秒），过期后下次查询会重新执行 adb devices
+_SNAPSHOT_TTL = 1.0
+
+# 雷电模拟器 ADB 路径
+LDPLAYER_ADB_PATHS = [
+    r"D:\leidian\LDPlayer9\adb.exe",
+    r"C:\leidian\LDPlayer9\adb.exe",
+    r"D:\Program Files\leidian\LDPlayer9\adb.exe",
+    r"C:\Program Files\leidian\LDPlayer9\adb.exe",
+]
+
+_adb_command: Optional[str] = None
+
+
+def get_adb_command() -> str:
+    """获取可用的 ADB 命令（结果缓存，只探测一次）"""
+    global _adb_command
+    if _adb_command is not None:
+        return _adb_command
+    # 先检查系统 PATH
+    if shutil.which("adb"):
+        _adb_command = "adb"
+        return _adb_command
+    # 再检查雷电模拟器
+    for path in LDPLAYER_ADB_PATHS:
+        if os.path.exists(path):
+            _adb_command = path
+            return _adb_command
+    _adb_command = "adb"  # 默认
+    return _adb_command
+
+
+def query_adb_devices() -> Dict[str, str]:
+    """查询一次设备状态，返回 {device_id: state}
+
+    优先直连 adb 服务器（单次回环 socket 读写，无 fork+exec）；
+    服务器未运行时回退到 adb devices 子进程，由它顺带拉起服务器。
+    超时或 adb 不可用时返回空表，调用方会将设备标记为离线。
+    """
+    try:
+        return adb_client.devices()
+    except Exception:
+        pass
+
+    try:
+        result = subprocess.run(
+            [get_adb_command(), "devices"],
+            capture_output=True,  # 不设 text=True，按字节解析避免整块解码
+            timeout=2  # adb 走本地回环，2秒足够
+        )
+    except subprocess.TimeoutExpired:
+        return {}
+    except Exception:
+        return {}
+    return adb_client.parse_devices_output(result.stdout)
+
 
 class DeviceStatus(Enum):
     """设备状态"""
@@ -23,7 +86,7 @@ class Device:
     device_id: str
     status: DeviceStatus = DeviceStatus.IDLE
     current_job_id: Optional[str] = None
-    last_used: Optional[datetime] = None
+    last_used_ns: Optional[int] = None  # 最近使用时间（epoch ns）
     total_jobs: int = 0
     success_jobs: int = 0
     failed_jobs: int = 0
@@ -43,6 +106,32 @@ class DevicePool:
         self._devices: Dict[str, Device] = {}
         self._lock = threading.Lock()
         self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        # adb devices 的缓存快照：{device_id: state}，避免逐设备 get-state
+        self._snapshot: Dict[str, str] = {}
+        self._snapshot_ts: float = 0.0
+        # O(1) 状态计数，在状态转换时维护，避免统计时扫描设备表；
+        # 聚合已是常数次整数加减，无循环可向量化或 JIT
+        self._idle_n = 0
+        self._busy_n = 0
+        # 空闲设备自由链表：转为 IDLE 时入队，取用时弹出
+        # 指定设备占用会留下过期表项，由 get_idle_device 惰性清理
+        self._idle_q: deque = deque()
+
+    def _set_status(self, device: Device, status: DeviceStatus) -> None:
+        """切换设备状态并维护空闲/忙碌计数（须在持有 _lock 时调用）"""
+        old = device.status
+        if old is status:
+            return
+        if old is DeviceStatus.IDLE:
+            self._idle_n -= 1
+        elif old is DeviceStatus.BUSY:
+            self._busy_n -= 1
+        if status is DeviceStatus.IDLE:
+            self._idle_n += 1
+            self._idle_q.append(device.device_id)
+        elif status is DeviceStatus.BUSY:
+            self._busy_n += 1
+        device.status = status
     
     def add_device(self, device_id: str, force_online: bool = False) -> bool:
         """
@@ -63,12 +152,15 @@ class DevicePool:
                 # Mock 模式：直接标记为在线
                 status = DeviceStatus.IDLE
             elif not self._check_device_online(device_id):
-                print(f"警告: 设备 {device_id} 当前不在线，已添加但标记为离线")
+                logger.warning(f"警告: 设备 {device_id} 当前不在线，已添加但标记为离线")
                 status = DeviceStatus.OFFLINE
             else:
                 status = DeviceStatus.IDLE
             
             self._devices[device_id] = Device(device_id=device_id, status=status)
+            if status is DeviceStatus.IDLE:
+                self._idle_n += 1
+                self._idle_q.append(device_id)
             return True
     
     def remove_device(self, device_id: str) -> bool:
@@ -78,25 +170,64 @@ class DevicePool:
                 return False
             
             device = self._devices[device_id]
-            if device.status == DeviceStatus.BUSY:
+            if device.status is DeviceStatus.BUSY:
                 return False  # 不能移除正在工作的设备
-            
+
+            if device.status is DeviceStatus.IDLE:
+                self._idle_n -= 1
             del self._devices[device_id]
             return True
     
     def get_idle_device(self) -> Optional[str]:
         """
-        获取一个空闲设备
-        
+        获取一个空闲设备（O(1)，从自由链表取，不扫描设备表）
+
         Returns:
             空闲设备的ID，如果没有则返回None
         """
         with self._lock:
-            for device_id, device in self._devices.items():
-                if device.status == DeviceStatus.IDLE:
-                    return device_id
-            return None
+            return self._peek_idle()
+
+    def _peek_idle(self) -> Optional[str]:
+        """返回自由链表队首的空闲设备，顺带清理过期表项（须持有 _lock）"""
+        while self._idle_q:
+            device_id = self._idle_q[0]
+            device = self._devices.get(device_id)
+            if device is not None and device.status is DeviceStatus.IDLE:
+                return device_id
+            # 设备已被移除/占用/离线，丢弃过期表项
+            self._idle_q.popleft()
+        return None
     
+    def acquire_any_idle(self, job_id: str, preferred: Optional[str] = None) -> Optional[str]:
+        """
+        原子地选取并占用一个空闲设备（一次加锁完成查找+占用）
+
+        Args:
+            job_id: 任务ID
+            preferred: 指定设备（任务绑定设备时必须等待该设备空闲）
+
+        Returns:
+            占用到的设备ID，无可用设备时返回None
+        """
+        with self._lock:
+            if preferred is not None:
+                device = self._devices.get(preferred)
+                if device is None or device.status is not DeviceStatus.IDLE:
+                    return None
+                target = preferred
+            else:
+                target = self._peek_idle()
+                if target is None:
+                    return None
+                self._idle_q.popleft()
+                device = self._devices[target]
+
+            self._set_status(device, DeviceStatus.BUSY)
+            device.current_job_id = job_id
+            device.last_used_ns = time.time_ns()
+            return target
+
     def acquire_device(self, device_id: str, job_id: str) -> bool:
         """
         占用设备
@@ -113,12 +244,12 @@ class DevicePool:
                 return False
             
             device = self._devices[device_id]
-            if device.status != DeviceStatus.IDLE:
+            if device.status is not DeviceStatus.IDLE:
                 return False
-            
-            device.status = DeviceStatus.BUSY
+
+            self._set_status(device, DeviceStatus.BUSY)
             device.current_job_id = job_id
-            device.last_used = datetime.now()
+            device.last_used_ns = time.time_ns()
             return True
     
     def release_device(self, device_id: str, success: bool = True) -> bool:
@@ -137,7 +268,7 @@ class DevicePool:
                 return False
             
             device = self._devices[device_id]
-            device.status = DeviceStatus.IDLE
+            self._set_status(device, DeviceStatus.IDLE)
             device.current_job_id = None
             device.total_jobs += 1
             
@@ -159,39 +290,52 @@ class DevicePool:
             return self._devices.get(device_id)
     
     def refresh_status(self) -> None:
-        """刷新所有设备状态"""
+        """刷新所有设备状态（一次 adb devices 调用更新全部设备）"""
+        snapshot = self._refresh_snapshot(force=True)
         with self._lock:
             for device_id, device in self._devices.items():
-                if device.status != DeviceStatus.BUSY:
-                    if self._check_device_online(device_id):
-                        device.status = DeviceStatus.IDLE
+                if device.status is not DeviceStatus.BUSY:
+                    if snapshot.get(device_id) == "device":
+                        self._set_status(device, DeviceStatus.IDLE)
                     else:
-                        device.status = DeviceStatus.OFFLINE
-    
+                        self._set_status(device, DeviceStatus.OFFLINE)
+
+    def list_adb_devices(self) -> List[tuple]:
+        """列出 adb 已识别的所有设备及状态
+
+        Returns:
+            [(device_id, state), ...]，state 通常为 device/offline
+        """
+        return list(self._refresh_snapshot(force=True).items())
+
+    def _refresh_snapshot(self, force: bool = False) -> Dict[str, str]:
+        """刷新设备状态快照（带 TTL 缓存，避免频繁执行 adb devices）"""
+        if not force and time.monotonic() - self._snapshot_ts < _SNAPSHOT_TTL:
+            return self._snapshot
+        self._snapshot = query_adb_devices()
+        self._snapshot_ts = time.monotonic()
+        return self._snapshot
+
     def _check_device_online(self, device_id: str) -> bool:
-        """检查设备是否在线"""
-        try:
-            result = subprocess.run(
-                ["adb", "-s", device_id, "get-state"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            return result.stdout.strip() == "device"
-        except Exception:
-            return False
+        """检查设备是否在线（读取快照，不逐设备探测）"""
+        return self._refresh_snapshot().get(device_id) == "device"
     
+    def snapshot(self) -> tuple:
+        """一次加锁取回 (总数, 空闲, 忙碌) 的一致快照"""
+        with self._lock:
+            return len(self._devices), self._idle_n, self._busy_n
+
     @property
     def idle_count(self) -> int:
         """空闲设备数量"""
         with self._lock:
-            return sum(1 for d in self._devices.values() if d.status == DeviceStatus.IDLE)
-    
+            return self._idle_n
+
     @property
     def busy_count(self) -> int:
         """忙碌设备数量"""
         with self._lock:
-            return sum(1 for d in self._devices.values() if d.status == DeviceStatus.BUSY)
+            return self._busy_n
     
     @property
     def total_count(self) -> int:
@@ -1,10 +1,19 @@
 """任务定义模块"""
 
+import itertools
+import secrets
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional
-import uuid
+from typing import List, Optional
+
+# 任务ID = 进程级随机前缀 + 自增计数，比逐个生成 uuid4 便宜得多
+_ID_PREFIX = secrets.token_hex(2)
+_ID_COUNTER = itertools.count(1)
+
+
+def _new_job_id() -> str:
+    return f"{_ID_PREFIX}{next(_ID_COUNTER):04x}"
 
 
 class JobStatus(Enum):
@@ -18,11 +27,15 @@ class JobStatus(Enum):
 
 @dataclass
 class JobResult:
-    """任务执行结果"""
+    """任务执行结果
+
+    时间戳以整数纳秒（epoch ns）记录，避免热路径上构造 datetime 对象；
+    datetime 形式通过 started_at/finished_at 属性按需生成。
+    """
     success: bool
     message: str
-    started_at: Optional[datetime] = None
-    finished_at: Optional[datetime] = None
+    started_ns: Optional[int] = None
+    finished_ns: Optional[int] = None
     device_id: Optional[str] = None
     steps: int = 0
     error: Optional[str] = None
@@ -30,10 +43,31 @@ class JobResult:
     @property
     def duration(self) -> Optional[float]:
         """执行耗时（秒）"""
-        if self.started_at and self.finished_at:
-            return (self.finished_at - self.started_at).total_seconds()
+        if self.started_ns and self.finished_ns:
+            return (self.finished_ns - self.started_ns) / 1e9
         return None
 
+    @property
+    def started_at(self) -> Optional[datetime]:
+        """开始时间（按需从纳秒时间戳生成）"""
+        if self.started_ns is None:
+            return None
+        return datetime.fromtimestamp(self.started_ns / 1e9)
+
+    @property
+    def finished_at(self) -> Optional[datetime]:
+        """结束时间（按需从纳秒时间戳生成）"""
+        if self.finished_ns is None:
+            return None
+        return datetime.fromtimestamp(self.finished_ns / 1e9)
+
+
+# to_dict 缓存跟踪的字段：任一写入都使缓存失效
+_DICT_FIELDS = frozenset((
+    "id", "name", "task", "cron", "device_id", "status", "retry_count",
+    "created_at",
+))
+
 
 @dataclass
 class Job:
@@ -43,18 +77,35 @@ class Job:
     cron: Optional[str] = None         # cron表达式（定时任务）
     device_id: Optional[str] = None    # 指定设备（None则自动分配）
     retry_count: int = 0               # 重试次数
+    cancelled: bool = False            # 取消墓碑：队列出队时跳过
     max_retries: int = 3               # 最大重试次数
     timeout: int = 300                 # 超时时间（秒）
+    # 确定性动作序列：设置后跳过模型，合并为一次 adb shell 执行
+    batch_commands: Optional[List[str]] = None
     
     # 内部字段
-    id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
+    id: str = field(default_factory=_new_job_id)
     status: JobStatus = JobStatus.PENDING
     result: Optional[JobResult] = None
     created_at: datetime = field(default_factory=datetime.now)
-    
+    # to_dict 结果缓存：None 表示脏，由 __setattr__ 在字段写入时置脏
+    _dict_cache: Optional[dict] = field(default=None, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in _DICT_FIELDS:
+            object.__setattr__(self, "_dict_cache", None)
+
     def to_dict(self) -> dict:
-        """转换为字典"""
-        return {
+        """转换为字典（结果缓存，字段变更时自动失效）
+
+        面板每帧对 pending/running/history 全量调 to_dict；历史里的
+        终态任务字段不再变化，字典只构建一次，此后轮询是纯引用读。
+        """
+        cached = self._dict_cache
+        if cached is not None:
+            return cached
+        d = {
             "id": self.id,
             "name": self.name,
             "task": self.task,
@@ -64,6 +115,8 @@ class Job:
             "retry_count": self.retry_count,
             "created_at": self.created_at.isoformat(),
         }
+        self._dict_cache = d
+        return d
     
     def __repr__(self) -> str:
         return f"Job(id={self.id}, name={self.name}, status={self.status.value})"
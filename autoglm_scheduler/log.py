@@ -0,0 +1,40 @@
+"""日志模块
+
+工作线程直接 print 会在 sys.stdout 的锁上相互排队，并发执行时把日志 I/O
+拖进了任务临界路径。这里统一走 logging：工作线程只把记录放进内存队列
+（QueueHandler），由独立的监听线程（QueueListener）负责真正写 stdout。
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+logger = logging.getLogger("autoglm_scheduler")
+
+_listener: Optional[QueueListener] = None
+
+
+def setup(verbose: bool = True) -> logging.Logger:
+    """初始化日志（幂等）：挂载队列处理器并启动监听线程
+
+    Args:
+        verbose: True 输出 INFO 级别，False 只输出 WARNING 及以上
+
+    Returns:
+        包级 logger
+    """
+    global _listener
+    if _listener is None:
+        q = queue.SimpleQueue()
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter("%(message)s"))
+        _listener = QueueListener(q, stream)
+        _listener.start()
+        logger.addHandler(QueueHandler(q))
+        logger.propagate = False
+        atexit.register(_listener.stop)
+
+    logger.setLevel(logging.INFO if verbose else logging.WARNING)
+    return logger
@@ -1,18 +1,38 @@
 """调度器主模块"""
 
+import functools
+import queue
+import random
 import threading
 import time
+from collections import deque
 from datetime import datetime
 from typing import Optional, List, Callable
-from concurrent.futures import ThreadPoolExecutor, Future
-
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
 
+from autoglm_scheduler import log
 from autoglm_scheduler.job import Job, JobStatus, JobResult
 from autoglm_scheduler.device_pool import DevicePool, DeviceStatus
 from autoglm_scheduler.task_queue import TaskQueue
 
+# run_parallel 等待时判定“未结束”的状态集合，预先构建避免循环内重建
+_ACTIVE_STATES = frozenset((JobStatus.PENDING, JobStatus.RUNNING))
+
+# 配置文件监控的内部任务 id：挂在 APScheduler 上，但不属于用户的
+# 定时任务，列表与计数都要滤掉
+_CONFIG_WATCHER_ID = "_config_watcher"
+
+# 绑定设备忙碌时最多等待的轮数（每轮至多 1 秒），超过即把任务回队，
+# 工作线程去服务其他任务
+_PIN_WAIT_ROUNDS = 5
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_cron(expr: str):
+    """解析 cron 表达式（带缓存；CronTrigger 不可变，可跨任务共享）"""
+    from apscheduler.triggers.cron import CronTrigger
+
+    return CronTrigger.from_crontab(expr)
+
 
 class Scheduler:
     """
@@ -38,6 +58,8 @@ class Scheduler:
         max_workers: int = 5,
         verbose: bool = True,
         mock_mode: bool = False,
+        mock_instant: bool = False,
+        keep_history: bool = True,
     ):
         """
         初始化调度器
@@ -48,29 +70,64 @@ class Scheduler:
             model: 模型名称
             max_workers: 最大并发数
             verbose: 是否打印详细日志
+            mock_instant: Mock 模式下跳过模拟耗时（基准测试用，
+                让调度开销成为被测对象而不是 sleep）
+            keep_history: 是否保留任务历史（高吞吐压测可关闭，
+                省去每次完成的历史簿记）
         """
         self.base_url = base_url
         self.api_key = api_key
         self.model = model
         self.verbose = verbose
         self.mock_mode = mock_mode
+        self.mock_instant = mock_instant
+        self.keep_history = keep_history
+        self._log = log.setup(verbose)
+
+        if mock_mode:
+            self._log.info("🧪 Mock 模式已启用 - 不会连接真实设备")
         
-        if mock_mode and verbose:
-            print("🧪 Mock 模式已启用 - 不会连接真实设备")
-        
-        # 核心组件
+        # 核心组件（APScheduler 较重，延迟到实例化时才导入）
+        from apscheduler.schedulers.background import BackgroundScheduler
+
         self._device_pool = DevicePool(max_workers=max_workers)
         self._task_queue = TaskQueue()
         self._scheduler = BackgroundScheduler()
-        self._executor = ThreadPoolExecutor(max_workers=max_workers)
-        
+
+        # Job 对象池：定时任务每次触发需要新实例，从历史窗口淘汰的
+        # 对象回收复用，省去高频 cron 下的反复分配
+        self._job_pool: deque = deque(maxlen=512)
+        self._task_queue.on_evict = self._job_pool.append
+
         # 状态
         self._running = False
-        self._worker_thread: Optional[threading.Thread] = None
+        self._max_workers = max_workers
+        self._workers: List[threading.Thread] = []
         self._lock = threading.Lock()
+        # 每入队一个任务 release 一次，精确唤醒一个工作线程
+        self._job_sem = threading.Semaphore(0)
+        # 设备释放、任务完成时通知，供等待设备的线程和 run_parallel 使用
+        self._wake = threading.Condition()
         
         # 回调
         self._on_job_complete: Optional[Callable[[Job], None]] = None
+
+        # 状态变更订阅者（SSE 推送等）：事件只是个标记，订阅方收到后
+        # 自行拉取快照；无订阅者时发布是一次空列表判断，近乎零开销
+        self._subscribers: List[queue.SimpleQueue] = []
+
+        # RCU 式快照缓存：版本号在每次状态变更时递增（_publish 内），
+        # current_snapshot 按版本惰性重建，状态未变时读侧只是一次
+        # 属性加载，不碰任何锁
+        self._state_version = 0
+        self._snapshot_cache: tuple = (-1, 0, None)  # (版本, limit, 数据)
+
+        # 每线程独立的随机数发生器，避免模块级 random 的锁竞争
+        self._tls = threading.local()
+
+        # 配置文件热加载状态
+        self._config_path: Optional[str] = None
+        self._config_job_ids: dict = {}  # (name, task, cron, device) -> job_id
     
     def add_device(self, device_id: str) -> bool:
         """
@@ -84,13 +141,17 @@ class Scheduler:
         """
         # Mock 模式下强制设备在线
         success = self._device_pool.add_device(device_id, force_online=self.mock_mode)
-        if success and self.verbose:
-            print(f"✅ 添加设备: {device_id}")
+        if success:
+            self._log.info(f"✅ 添加设备: {device_id}")
+            self._publish()
         return success
     
     def remove_device(self, device_id: str) -> bool:
         """移除设备"""
-        return self._device_pool.remove_device(device_id)
+        success = self._device_pool.remove_device(device_id)
+        if success:
+            self._publish()
+        return success
     
     def add_cron_job(
         self,
@@ -99,6 +160,7 @@ class Scheduler:
         cron: str,
         device_id: Optional[str] = None,
         max_retries: int = 3,
+        batch_commands: Optional[List[str]] = None,
     ) -> str:
         """
         添加定时任务
@@ -109,6 +171,7 @@ class Scheduler:
             cron: cron表达式（如 "0 8 * * *" 表示每天8点）
             device_id: 指定设备（None则自动分配）
             max_retries: 最大重试次数
+            batch_commands: 确定性 adb shell 命令序列（设置后跳过模型）
             
         Returns:
             任务ID
@@ -119,20 +182,21 @@ class Scheduler:
             cron=cron,
             device_id=device_id,
             max_retries=max_retries,
+            batch_commands=batch_commands,
         )
         
         # 添加到APScheduler
         self._scheduler.add_job(
             func=self._enqueue_job,
-            trigger=CronTrigger.from_crontab(cron),
+            trigger=_parse_cron(cron),
             args=[job],
             id=job.id,
             name=name,
         )
         
-        if self.verbose:
-            print(f"✅ 添加定时任务: {name} (cron: {cron})")
-        
+        self._log.info(f"✅ 添加定时任务: {name} (cron: {cron})")
+        self._publish()
+
         return job.id
     
     def add_job(
@@ -141,6 +205,7 @@ class Scheduler:
         task: str,
         device_id: Optional[str] = None,
         max_retries: int = 3,
+        batch_commands: Optional[List[str]] = None,
     ) -> str:
         """
         添加立即执行的任务
@@ -150,6 +215,7 @@ class Scheduler:
             task: 任务描述
             device_id: 指定设备
             max_retries: 最大重试次数
+            batch_commands: 确定性 adb shell 命令序列（设置后跳过模型）
             
         Returns:
             任务ID
@@ -159,11 +225,65 @@ class Scheduler:
             task=task,
             device_id=device_id,
             max_retries=max_retries,
+            batch_commands=batch_commands,
         )
         
         self._enqueue_job(job, create_new=False)
         return job.id
     
+    def watch_config(self, path: Optional[str] = None, interval: int = 60) -> None:
+        """
+        监控 jobs.json 配置文件并热加载定时任务
+
+        立即同步一次，此后每 interval 秒检查文件变更（mtime 缓存，
+        未修改时不重新解析），外部编辑无需重启即可生效。
+
+        Args:
+            path: 配置文件路径（None 使用默认路径）
+            interval: 检查间隔（秒）
+        """
+        from apscheduler.triggers.interval import IntervalTrigger
+
+        from autoglm_scheduler import config
+
+        self._config_path = path or config.DEFAULT_CONFIG_FILE
+        self._sync_config_jobs()
+        self._scheduler.add_job(
+            func=self._sync_config_jobs,
+            trigger=IntervalTrigger(seconds=interval),
+            id=_CONFIG_WATCHER_ID,
+            name="config_watcher",
+            replace_existing=True,
+        )
+
+    def _sync_config_jobs(self) -> None:
+        """将配置文件中的任务集合与已注册的定时任务对齐"""
+        from autoglm_scheduler import config
+
+        entries = config.load_jobs(self._config_path)
+        desired = {
+            (e["name"], e["task"], e["cron"], e.get("device"),
+             tuple(e.get("batch") or ())): e
+            for e in entries
+        }
+
+        # 移除配置中已删除的任务
+        for key, job_id in list(self._config_job_ids.items()):
+            if key not in desired:
+                self.remove_cron_job(job_id)
+                del self._config_job_ids[key]
+
+        # 添加新出现的任务
+        for key, e in desired.items():
+            if key not in self._config_job_ids:
+                self._config_job_ids[key] = self.add_cron_job(
+                    name=e["name"],
+                    task=e["task"],
+                    cron=e["cron"],
+                    device_id=e.get("device"),
+                    batch_commands=e.get("batch"),
+                )
+
     def run_parallel(self, tasks: List[str]) -> List[JobResult]:
         """
         并发执行多个任务
@@ -174,17 +294,24 @@ class Scheduler:
         Returns:
             执行结果列表
         """
-        jobs = []
-        for i, task in enumerate(tasks):
-            job = Job(name=f"parallel_{i}", task=task)
-            queued_job = self._enqueue_job(job, create_new=False)
-            jobs.append(queued_job)
-        
-        # 等待所有任务完成
-        while any(j.status in [JobStatus.PENDING, JobStatus.RUNNING] for j in jobs):
-            time.sleep(0.5)
-        
-        return [j.result for j in jobs if j.result]
+        # 整批一次加锁入队，再一次性补足信号量，不逐任务加锁
+        jobs = [Job(name=f"parallel_{i}", task=task) for i, task in enumerate(tasks)]
+        accepted = self._task_queue.enqueue_many(jobs)
+        if len(accepted) < len(jobs):
+            self._log.warning(
+                f"⚠️ 队列内存超过高水位，{len(jobs) - len(accepted)} 个任务被拒绝"
+            )
+        if not accepted:
+            return []
+        self._log.info(f"📥 批量入队 {len(accepted)} 个任务")
+        self._job_sem.release(len(accepted))
+
+        # 等待所有任务完成（由任务完成通知唤醒，不做定时轮询）
+        with self._wake:
+            while any(j.status in _ACTIVE_STATES for j in accepted):
+                self._wake.wait(timeout=1.0)
+
+        return [j.result for j in accepted if j.result]
     
     def start(self, blocking: bool = True) -> None:
         """
@@ -198,15 +325,18 @@ class Scheduler:
         
         self._running = True
         self._scheduler.start()
+
+        # 启动常驻工作线程
+        for i in range(self._max_workers):
+            t = threading.Thread(
+                target=self._execute_worker, name=f"autoglm-worker-{i}", daemon=True
+            )
+            t.start()
+            self._workers.append(t)
         
-        # 启动工作线程
-        self._worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-        self._worker_thread.start()
-        
-        if self.verbose:
-            print("🚀 调度器已启动")
-            print(f"   设备数量: {self._device_pool.total_count}")
-            print(f"   定时任务: {len(self._scheduler.get_jobs())}")
+        self._log.info("🚀 调度器已启动")
+        self._log.info(f"   设备数量: {self._device_pool.total_count}")
+        self._log.info(f"   定时任务: {len(self.list_cron_jobs())}")
         
         if blocking:
             try:
@@ -218,12 +348,18 @@ class Scheduler:
     def stop(self) -> None:
         """停止调度器"""
         self._running = False
+        # 唤醒所有阻塞中的工作线程，使其检测到停止标志
+        for _ in self._workers:
+            self._job_sem.release()
+        with self._wake:
+            self._wake.notify_all()
         self._scheduler.shutdown()
-        self._executor.shutdown(wait=True)
+        for t in self._workers:
+            t.join(timeout=5)
+        self._workers.clear()
         self._device_pool.shutdown()
-        
-        if self.verbose:
-            print("🛑 调度器已停止")
+
+        self._log.info("🛑 调度器已停止")
     
     def _enqueue_job(self, job: Job, create_new: bool = True) -> Job:
         """将任务加入队列
@@ -236,54 +372,105 @@ class Scheduler:
             实际入队的 Job 对象
         """
         if create_new:
-            # 定时任务每次触发需要新实例
-            new_job = Job(
-                name=job.name,
-                task=job.task,
-                cron=job.cron,
-                device_id=job.device_id,
-                max_retries=job.max_retries,
-            )
+            # 定时任务每次触发需要新实例；优先复用对象池中的回收实例
+            try:
+                new_job = self._job_pool.pop()
+                new_job.__init__(
+                    name=job.name,
+                    task=job.task,
+                    cron=job.cron,
+                    device_id=job.device_id,
+                    max_retries=job.max_retries,
+                    batch_commands=job.batch_commands,
+                )
+            except IndexError:
+                new_job = Job(
+                    name=job.name,
+                    task=job.task,
+                    cron=job.cron,
+                    device_id=job.device_id,
+                    max_retries=job.max_retries,
+                    batch_commands=job.batch_commands,
+                )
         else:
             new_job = job
         
-        self._task_queue.enqueue(new_job)
-        if self.verbose:
-            print(f"📥 任务入队: {new_job.name}")
+        if not self._task_queue.enqueue(new_job):
+            self._log.warning(
+                f"⚠️ 队列内存超过高水位，任务被拒绝: {new_job.name}"
+            )
+            return new_job
+        self._log.info(f"📥 任务入队: {new_job.name}")
+        # 每个任务只唤醒一个工作线程，避免惊群
+        self._job_sem.release()
+        self._publish()
         return new_job
-    
-    def _worker_loop(self) -> None:
-        """工作循环：从队列取任务并分配给空闲设备"""
+
+    def _execute_worker(self) -> None:
+        """常驻工作线程：信号量表示有任务，取任务、占设备、就地执行
+
+        信号量等待带超时：退避中的重试任务没有对应的信号量配额，
+        超时后兜底轮询一次队列，到期的重试由此被捡起。
+        """
         while self._running:
-            # 检查是否有空闲设备和待执行任务
-            idle_device = self._device_pool.get_idle_device()
-            if idle_device is None:
-                time.sleep(0.1)
-                continue
-            
+            self._job_sem.acquire(timeout=1.0)
+            if not self._running:
+                break
+
             job = self._task_queue.dequeue()
             if job is None:
-                time.sleep(0.1)
                 continue
-            
-            # 如果任务指定了设备，检查是否匹配
-            target_device = job.device_id or idle_device
-            
-            # 尝试占用设备
-            if not self._device_pool.acquire_device(target_device, job.id):
-                # 设备被占用，放回队列
-                self._task_queue.enqueue(job)
+
+            target_device = self._acquire_device_for(job)
+            if target_device is None:
+                # 任务放回队列：停止时留给下次启动，绑定设备暂不可用
+                # 时等它回归；工作线程回到取任务循环继续服务
+                if not self._task_queue.requeue(job):
+                    self._log.warning(
+                        f"⚠️ 队列内存超过高水位，任务未能回队，已记为失败: {job.name}"
+                    )
+                if not self._running:
+                    break
                 continue
-            
-            # 提交任务执行
-            if self.verbose:
-                print(f"🏃 执行任务: {job.name} -> 设备: {target_device}")
-            
-            self._executor.submit(self._execute_job, job, target_device)
+
+            self._log.info(f"🏃 执行任务: {job.name} -> 设备: {target_device}")
+
+            self._execute_job(job, target_device)
+
+    def _acquire_device_for(self, job: Job) -> Optional[str]:
+        """为任务占用设备；无可用设备时等待释放通知
+
+        绑定设备的任务只做有限等待：设备不在池中或已离线时立即放弃，
+        设备忙碌时最多等 _PIN_WAIT_ROUNDS 轮，然后交回调用方回队。
+        工作线程不会被幽灵设备永久钉死，其他任务照常得到服务。
+
+        Returns:
+            占用到的设备ID；停止中或绑定设备暂不可用时返回 None
+        """
+        rounds = 0
+        while self._running:
+            target = self._device_pool.acquire_any_idle(job.id, preferred=job.device_id)
+            if target is not None:
+                return target
+            if job.device_id is not None:
+                device = self._device_pool.get_device(job.device_id)
+                if device is None or device.status in (
+                    DeviceStatus.OFFLINE, DeviceStatus.ERROR
+                ):
+                    self._log.warning(
+                        f"⚠️ 绑定设备不可用: {job.device_id}，任务回队: {job.name}"
+                    )
+                    return None
+                rounds += 1
+                if rounds >= _PIN_WAIT_ROUNDS:
+                    return None
+            with self._wake:
+                self._wake.wait(timeout=1.0)
+        return None
     
     def _execute_job(self, job: Job, device_id: str) -> None:
         """执行单个任务"""
-        started_at = datetime.now()
+        started_ns = time.time_ns()
         
         try:
             if self.mock_mode:
@@ -297,25 +484,25 @@ class Scheduler:
             job.result = JobResult(
                 success=True,
                 message=result_message,
-                started_at=started_at,
-                finished_at=datetime.now(),
+                started_ns=started_ns,
+                finished_ns=time.time_ns(),
                 device_id=device_id,
                 steps=steps,
             )
             
-            self._task_queue.complete(job.id, success=True)
+            self._task_queue.complete(job.id, success=True,
+                                      keep_history=self.keep_history)
             self._device_pool.release_device(device_id, success=True)
             
-            if self.verbose:
-                print(f"✅ 任务完成: {job.name} ({job.result.duration:.1f}s)")
+            self._log.info(f"✅ 任务完成: {job.name} ({job.result.duration:.1f}s)")
             
         except Exception as e:
             # 执行失败
             job.result = JobResult(
                 success=False,
                 message=str(e),
-                started_at=started_at,
-                finished_at=datetime.now(),
+                started_ns=started_ns,
+                finished_ns=time.time_ns(),
                 device_id=device_id,
                 error=str(e),
             )
@@ -324,38 +511,71 @@ class Scheduler:
             if job.retry_count < job.max_retries:
                 self._task_queue.retry(job.id)
                 self._device_pool.release_device(device_id, success=False)
-                if self.verbose:
-                    print(f"🔄 任务重试: {job.name} (第{job.retry_count}次)")
+                self._log.info(f"🔄 任务重试: {job.name} (第{job.retry_count}次)")
             else:
-                self._task_queue.complete(job.id, success=False)
+                self._task_queue.complete(job.id, success=False,
+                                          keep_history=self.keep_history)
                 self._device_pool.release_device(device_id, success=False)
-                if self.verbose:
-                    print(f"❌ 任务失败: {job.name} - {e}")
+                self._log.warning(f"❌ 任务失败: {job.name} - {e}")
         
         # 触发回调
         if self._on_job_complete:
             self._on_job_complete(job)
+
+        # 设备已释放、任务已完成：唤醒工作线程和 run_parallel 等待者
+        with self._wake:
+            self._wake.notify_all()
+        self._publish()
     
+    def _rng(self) -> random.Random:
+        """当前线程的随机数发生器（首次使用时创建）"""
+        rng = getattr(self._tls, "rng", None)
+        if rng is None:
+            rng = self._tls.rng = random.Random()
+        return rng
+
     def _mock_execute(self, job: Job, device_id: str) -> tuple:
         """Mock 模式执行任务"""
-        import random
-        
-        if self.verbose:
-            print(f"🧪 [Mock] 模拟执行: {job.task[:30]}...")
+        rng = self._rng()
+
+        self._log.info(f"🧪 [Mock] 模拟执行: {job.task[:30]}...")
         
-        # 模拟执行时间 1-3 秒
-        time.sleep(random.uniform(1, 3))
+        # 模拟执行时间 1-3 秒（mock_instant 时跳过，测纯调度吞吐）
+        if not self.mock_instant:
+            time.sleep(rng.uniform(1, 3))
         
         # 模拟步数
-        steps = random.randint(3, 10)
+        steps = rng.randint(3, 10)
         
-        if self.verbose:
-            print(f"🧪 [Mock] 完成 {steps} 个步骤")
+        self._log.info(f"🧪 [Mock] 完成 {steps} 个步骤")
         
         return f"[Mock] 任务 '{job.name}' 模拟执行成功", steps
     
+    def _batch_execute(self, job: Job, device_id: str) -> tuple:
+        """批量模式执行任务：动作序列合并为一次 adb shell 调用"""
+        import subprocess
+
+        from autoglm_scheduler.device_pool import get_adb_command
+
+        script = "; ".join(job.batch_commands)
+        result = subprocess.run(
+            [get_adb_command(), "-s", device_id, "shell", script],
+            capture_output=True,
+            text=True,
+            timeout=job.timeout,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"批量命令执行失败 (exit {result.returncode}): {result.stderr.strip()}"
+            )
+        return result.stdout.strip(), len(job.batch_commands)
+
     def _real_execute(self, job: Job, device_id: str) -> tuple:
         """真实模式执行任务"""
+        # 确定性动作序列不经过模型，单次 adb 往返执行完毕
+        if job.batch_commands:
+            return self._batch_execute(job, device_id)
+
         from phone_agent import PhoneAgent
         from phone_agent.agent import AgentConfig
         from phone_agent.model import ModelConfig
@@ -384,16 +604,24 @@ class Scheduler:
     def list_devices(self) -> list:
         """列出所有设备"""
         return self._device_pool.list_devices()
+
+    def list_adb_devices(self) -> list:
+        """列出 adb 已识别的设备（一次 adb devices 调用）
+
+        Returns:
+            [(device_id, state), ...]
+        """
+        return self._device_pool.list_adb_devices()
     
-    def list_pending_jobs(self) -> list:
+    def list_pending_jobs(self) -> tuple:
         """列出等待中的任务"""
         return self._task_queue.list_pending()
     
-    def list_running_jobs(self) -> list:
+    def list_running_jobs(self) -> tuple:
         """列出运行中的任务"""
         return self._task_queue.list_running()
     
-    def list_history(self, limit: int = 20) -> list:
+    def list_history(self, limit: int = 20) -> tuple:
         """列出历史任务"""
         return self._task_queue.list_history(limit)
     
@@ -403,37 +631,117 @@ class Scheduler:
     
     def cancel_job(self, job_id: str) -> bool:
         """取消任务"""
-        return self._task_queue.cancel(job_id)
+        success = self._task_queue.cancel(job_id)
+        if success:
+            self._publish()
+        return success
     
     def list_cron_jobs(self) -> list:
-        """列出所有定时任务"""
-        return self._scheduler.get_jobs()
+        """列出所有定时任务（不含配置监控等内部任务）"""
+        return [
+            j for j in self._scheduler.get_jobs() if j.id != _CONFIG_WATCHER_ID
+        ]
     
     def remove_cron_job(self, job_id: str) -> bool:
         """移除定时任务"""
         try:
             self._scheduler.remove_job(job_id)
-            return True
         except Exception:
             return False
+        self._publish()
+        return True
     
     def on_job_complete(self, callback: Callable[[Job], None]) -> None:
         """设置任务完成回调"""
         self._on_job_complete = callback
+
+    def subscribe(self) -> queue.SimpleQueue:
+        """订阅状态变更通知，返回事件队列（任务入队/完成、设备增减时有事件）"""
+        q: queue.SimpleQueue = queue.SimpleQueue()
+        self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q: queue.SimpleQueue) -> None:
+        """取消订阅"""
+        try:
+            self._subscribers.remove(q)
+        except ValueError:
+            pass
+
+    def _publish(self) -> None:
+        """向所有订阅者投递一个变更标记，并使快照缓存失效"""
+        # int += 1 在 GIL 下对读侧安全：读者要么看到旧版本（用旧快照）
+        # 要么看到新版本（触发重建），不会读到撕裂值
+        self._state_version += 1
+        if not self._subscribers:
+            return
+        for q in list(self._subscribers):
+            q.put(True)
     
     @property
     def status(self) -> dict:
         """获取调度器状态"""
+        total, idle, busy = self._device_pool.snapshot()
         return {
             "running": self._running,
             "devices": {
-                "total": self._device_pool.total_count,
-                "idle": self._device_pool.idle_count,
-                "busy": self._device_pool.busy_count,
+                "total": total,
+                "idle": idle,
+                "busy": busy,
             },
             "jobs": {
                 "pending": self._task_queue.pending_count,
                 "running": self._task_queue.running_count,
             },
-            "cron_jobs": len(self._scheduler.get_jobs()),
+            "cron_jobs": len(self.list_cron_jobs()),
         }
+
+    def snapshot(self, history_limit: int = 10) -> dict:
+        """一次调用取回面板所需的全部状态
+
+        Web 端逐个端点调用 status / list_devices / list_cron_jobs /
+        list_running_jobs / list_history 会把加锁次数放大 5 倍，还可能
+        出现 status 里的设备计数与几毫秒后取到的设备列表对不上的撕裂读。
+        这里收拢为一次调用：队列、设备池、APScheduler 各自持锁，但每个
+        组件只进出锁一次，且所有字段出自同一轮采样。
+
+        Returns:
+            {"status", "devices", "cron", "running", "history"} 字典，
+            devices/cron/running/history 为原始对象列表，由调用方格式化
+        """
+        total, idle, busy = self._device_pool.snapshot()
+        cron_jobs = self.list_cron_jobs()
+        return {
+            "status": {
+                "running": self._running,
+                "devices": {"total": total, "idle": idle, "busy": busy},
+                "jobs": {
+                    "pending": self._task_queue.pending_count,
+                    "running": self._task_queue.running_count,
+                },
+                "cron_jobs": len(cron_jobs),
+            },
+            "devices": self._device_pool.list_devices(),
+            "cron": cron_jobs,
+            "running": self._task_queue.list_running(),
+            "history": self._task_queue.list_history(history_limit),
+        }
+
+    def current_snapshot(self, history_limit: int = 10) -> dict:
+        """取回状态快照；状态未变时是无锁的纯指针读（RCU 读侧）
+
+        _publish 在每次状态变更时递增版本号，这里对比缓存元组里记下的
+        版本：一致则直接返回上次构建的快照——元组属性读在 GIL 下是
+        原子的，读侧一把锁都不碰。版本落后时由首个读者重建并换上新
+        元组；并发读者可能重复重建一次，结果等价，后写者胜。
+
+        Returns:
+            与 snapshot() 同构的字典；调用方只读，不要原地修改
+        """
+        version = self._state_version
+        cached_version, cached_limit, data = self._snapshot_cache
+        if version == cached_version and history_limit == cached_limit:
+            return data
+        data = self.snapshot(history_limit)
+        self._snapshot_cache = (version, history_limit, data)
+        return data
@@ -1,58 +1,311 @@
 """任务队列模块"""
 
+import asyncio
+import heapq
+import queue
+import sys
 import threading
+import time
 from collections import deque
+from itertools import count
 from typing import Optional, List, Callable
 from datetime import datetime
+from weakref import WeakValueDictionary
 
 from autoglm_scheduler.job import Job, JobStatus
 
+# 枚举成员绑定为模块级常量：省去热路径上每次 JobStatus.XXX 的
+# 成员表查找，加载为一条 LOAD_GLOBAL
+_PENDING = JobStatus.PENDING
+_RUNNING = JobStatus.RUNNING
+_SUCCESS = JobStatus.SUCCESS
+_FAILED = JobStatus.FAILED
+_CANCELLED = JobStatus.CANCELLED
+
 
 class TaskQueue:
-    """任务队列：管理待执行的任务"""
+    """任务队列：管理待执行的任务
+
+    锁只保护容器成员关系；job 字段（status/retry_count/result）的写入
+    一律放在临界区外，读取方需容忍瞬时不一致。唯一例外是 PENDING
+    状态的两个翻转：cancel 的墓碑（-> CANCELLED）和出队认领
+    （-> RUNNING）。二者都必须在 _pending_lock 内完成（_claim /
+    _pop_shard / cancel），同一任务只会有其一成功，_pending_n 也
+    只会被赢家一方递减。
+    """
     
-    def __init__(self):
-        self._queue: deque[Job] = deque()
+    def __init__(self, byte_limit: int = 16 * 1024 * 1024):
+        # 等待队列按设备分片：未绑定设备的任务进全局队列，绑定的
+        # 进各自设备的队列，互不排队；绑定是放置约束，不做任务窃取。
+        # 全局队列是纯 FIFO 热路径，用 C 实现的 SimpleQueue 承载，
+        # 收发不经 Python 层锁；取消不物理删除，置 CANCELLED 墓碑，
+        # 出队时跳过。重试任务走独立队列，出队时优先消费
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()  # 全局（未绑定设备）
+        # 重试按 (到期时间, 序号) 组成最小堆，指数退避：2**retry_count 秒，
+        # 到期后优先于新任务出队，不再无条件插队
+        self._retry_heap: list = []
+        self._retry_seq = count()
+        self._retry_lock = threading.Lock()
+        self._pinned: dict[str, deque[Job]] = {}  # device_id -> 队列
+        self._pending_n = 0
+        # 内存水位：粗略按 getsizeof 记账，入队加、物理离队减（一次
+        # int 加减，GIL 下原子）；超过高水位拒绝入队，防止消费不动时
+        # 队列无界膨胀
+        self._bytes = 0
+        self._byte_limit = byte_limit
         self._running: dict[str, Job] = {}  # job_id -> Job
-        self._history: List[Job] = []
-        self._lock = threading.Lock()
+        # 历史是定容窗口，用预分配环形缓冲存储：head 指向最旧记录，
+        # 写满后新记录原位覆盖最旧者，追加与淘汰都是 O(1) 且零分配；
+        # 被覆盖的记录经 _evict 走 on_evict 回收
         self._max_history = 100  # 最大历史记录数
+        self._history: List[Optional[Job]] = [None] * self._max_history
+        self._hist_head = 0  # 最旧记录下标
+        self._hist_n = 0
+        # 写时复制的只读视图：每次历史变更后在锁内重建并整体替换，
+        # 读方无锁拿引用（GIL 下指针读原子），面板高频轮询不再抢锁
+        self._history_view: tuple = ()
+        # 三块状态各自独立加锁，生产者（enqueue）与消费者（dequeue/complete)
+        # 互不阻塞；需要跨区域操作时按 pending → running → history 顺序
+        # 依次短暂持锁，绝不同时持有两把锁调用外部代码
+        self._pending_lock = threading.Lock()
+        self._running_lock = threading.Lock()
+        self._history_lock = threading.Lock()
+        # id -> Job 索引：入队时登记，跌出历史窗口时注销，
+        # get_job/cancel 不再线性扫描三块结构。弱引用存值，没进历史
+        # 窗口的任务（如关闭留史的完成路径）随对象回收自动消失，
+        # 索引不会成为持有已完结任务的最后一根强引用
+        self._index: WeakValueDictionary = WeakValueDictionary()
+        self._index_lock = threading.Lock()
+        # 历史记录淘汰回调：被挤出窗口的 Job 不再被队列引用，可供回收复用
+        self.on_evict: Optional[Callable[[Job], None]] = None
     
-    def enqueue(self, job: Job) -> None:
+    def enqueue(self, job: Job) -> bool:
         """
         将任务加入队列
         
         Args:
             job: 任务对象
+            
+        Returns:
+            是否入队成功；队列内存超过高水位时拒绝并返回 False，
+            调用方（如定时触发）可延后重试
         """
-        with self._lock:
-            job.status = JobStatus.PENDING
-            self._queue.append(job)
+        sz = self._job_bytes(job)
+        if self._bytes + sz > self._byte_limit:
+            return False
+        with self._index_lock:
+            self._index[job.id] = job
+        if job.status is not _PENDING:  # 新建任务默认即 PENDING，常见路径零写
+            job.status = _PENDING
+        self._bytes += sz
+        if job.device_id is None:
+            self._queue.put(job)
+            self._pending_n += 1
+        else:
+            with self._pending_lock:
+                self._pinned_shard(job.device_id).append(job)
+                self._pending_n += 1
+        return True
     
-    def dequeue(self) -> Optional[Job]:
+    def enqueue_many(self, jobs: List[Job]) -> List[Job]:
+        """
+        批量入队（一次加锁完成，供 run_parallel 等突发提交使用）
+
+        与 enqueue 相同的内存水位门控按整批累计：超出高水位时截断，
+        只收下水位内的前缀，后面的任务原样退还调用方处理。
+
+        Args:
+            jobs: 任务对象列表
+
+        Returns:
+            实际入队的任务列表（可能短于传入列表）
+        """
+        accepted = []
+        total = self._bytes
+        for job in jobs:
+            sz = self._job_bytes(job)
+            if total + sz > self._byte_limit:
+                break
+            total += sz
+            accepted.append(job)
+        if not accepted:
+            return accepted
+        for job in accepted:
+            if job.status is not _PENDING:
+                job.status = _PENDING
+        with self._index_lock:
+            for job in accepted:
+                self._index[job.id] = job
+        pinned = []
+        for job in accepted:
+            self._bytes += self._job_bytes(job)
+            if job.device_id is None:
+                self._queue.put(job)
+            else:
+                pinned.append(job)
+        if pinned:
+            with self._pending_lock:
+                for job in pinned:
+                    self._pinned_shard(job.device_id).append(job)
+        self._pending_n += len(accepted)
+        return accepted
+    
+    @staticmethod
+    def _job_bytes(job: Job) -> int:
+        """任务的粗略内存占用（对象本身 + 任务描述文本）"""
+        return sys.getsizeof(job) + sys.getsizeof(job.task)
+
+    def _pinned_shard(self, device_id: str) -> deque:
+        """返回设备对应的绑定队列分片（须持有 _pending_lock）"""
+        shard = self._pinned.get(device_id)
+        if shard is None:
+            shard = self._pinned[device_id] = deque()
+        return shard
+
+    def _claim(self, job: Job) -> bool:
+        """原子认领：PENDING -> RUNNING，与 cancel 的墓碑翻转同锁互斥
+
+        出队候选弹出容器后不直接交付，先在 _pending_lock 内复核并
+        翻转状态；cancel 在同一把锁下做 PENDING -> CANCELLED，因此
+        同一任务只会被取消或被认领，不会两者皆中。
+        """
+        with self._pending_lock:
+            if job.cancelled or job.status is not _PENDING:
+                return False
+            job.status = _RUNNING
+            return True
+
+    def _pop_fast(self, q: queue.SimpleQueue) -> Optional[Job]:
+        """从 SimpleQueue 弹出首个认领成功的任务，丢弃墓碑"""
+        while True:
+            try:
+                job = q.get_nowait()
+            except queue.Empty:
+                return None
+            self._bytes -= self._job_bytes(job)
+            if self._claim(job):
+                return job
+            # 被取消的任务留在队列里作墓碑，此处丢弃
+
+    def _pop_due_retry(self, now: Optional[float] = None) -> Optional[Job]:
+        """弹出一个退避期已到的重试任务，没有则返回 None"""
+        if not self._retry_heap:
+            return None
+        if now is None:
+            now = time.monotonic()
+        while True:
+            with self._retry_lock:
+                if not self._retry_heap:
+                    return None
+                due, _, job = self._retry_heap[0]
+                if due > now and job.status is _PENDING:
+                    return None  # 队首未到期且有效，后面的更不会到期
+                heapq.heappop(self._retry_heap)
+                self._bytes -= self._job_bytes(job)
+            # 认领放在 _retry_lock 外，避免叠加持有两把锁
+            if due <= now and self._claim(job):
+                return job
+            # 墓碑或认领竞争失败：丢弃，继续看下一个
+
+    def _pop_shard(self, shard: Optional[deque]) -> Optional[Job]:
+        """弹出分片队首的有效任务并就地认领（须持有 _pending_lock）"""
+        while shard:
+            job = shard.popleft()
+            self._bytes -= self._job_bytes(job)
+            if not job.cancelled and job.status is _PENDING:
+                job.status = _RUNNING  # 已持 _pending_lock，就地认领
+                return job
+        return None
+
+    def _pop_pinned(self, device_id: Optional[str]) -> Optional[Job]:
+        """弹出一个绑定任务：优先指定设备，其次积压最多的分片（须持锁）"""
+        if device_id is not None:
+            job = self._pop_shard(self._pinned.get(device_id))
+            if job is not None:
+                return job
+        for shard in sorted(self._pinned.values(), key=len, reverse=True):
+            job = self._pop_shard(shard)
+            if job is not None:
+                return job
+        return None
+
+    def dequeue(self, device_id: Optional[str] = None) -> Optional[Job]:
         """
         从队列取出一个任务
         
+        优先级：指定设备的绑定任务 > 到期重试 > 全局队列 > 其他绑定分片。
+        
+        Args:
+            device_id: 调用方已持有的设备，优先取绑定到它的任务
+            
         Returns:
             任务对象，如果队列为空则返回None
         """
-        with self._lock:
-            if not self._queue:
-                return None
-            
-            job = self._queue.popleft()
-            job.status = JobStatus.RUNNING
+        job = None
+        if device_id is not None:
+            with self._pending_lock:
+                job = self._pop_shard(self._pinned.get(device_id))
+        if job is None:
+            job = self._pop_due_retry()
+        if job is None:
+            job = self._pop_fast(self._queue)
+        if job is None:
+            with self._pending_lock:
+                job = self._pop_pinned(device_id)
+        if job is None:
+            return None
+        self._pending_n -= 1
+
+        # 状态已在认领时翻转为 RUNNING，这里只登记运行表
+        with self._running_lock:
             self._running[job.id] = job
-            return job
-    
-    def peek(self) -> Optional[Job]:
-        """查看队首任务（不取出）"""
-        with self._lock:
-            if not self._queue:
-                return None
-            return self._queue[0]
+        return job
     
-    def complete(self, job_id: str, success: bool, message: str = "") -> bool:
+    def dequeue_batch(self, max_n: int, device_id: Optional[str] = None) -> List[Job]:
+        """
+        批量取出任务，锁开销按批摊薄（短任务密集时用）
+        
+        取用优先级与 dequeue 相同；取到的任务一次性登记进运行表。
+        
+        Args:
+            max_n: 最多取出的任务数
+            device_id: 调用方已持有的设备，优先取绑定到它的任务
+            
+        Returns:
+            取出的任务列表（可能少于 max_n，队列空时为空列表）
+        """
+        batch = []
+        with self._pending_lock:
+            if device_id is not None:
+                shard = self._pinned.get(device_id)
+                while len(batch) < max_n:
+                    job = self._pop_shard(shard)
+                    if job is None:
+                        break
+                    batch.append(job)
+        now = time.monotonic()
+        while len(batch) < max_n:
+            job = self._pop_due_retry(now)
+            if job is None:
+                break
+            batch.append(job)
+        while len(batch) < max_n:
+            job = self._pop_fast(self._queue)
+            if job is None:
+                break
+            batch.append(job)
+        if not batch:
+            return batch
+        self._pending_n -= len(batch)
+
+        # 状态均已在认领时翻转为 RUNNING，这里只登记运行表
+        with self._running_lock:
+            for job in batch:
+                self._running[job.id] = job
+        return batch
+
+    def complete(self, job_id: str, success: bool, message: str = "",
+                 keep_history: bool = True) -> bool:
         """
         标记任务完成
         
@@ -60,24 +313,82 @@ class TaskQueue:
             job_id: 任务ID
             success: 是否成功
             message: 结果消息
+            keep_history: 是否记入历史（吞吐压测等不看历史的场景可关）
             
         Returns:
             是否成功标记
         """
-        with self._lock:
+        with self._running_lock:
             if job_id not in self._running:
                 return False
-            
             job = self._running.pop(job_id)
-            job.status = JobStatus.SUCCESS if success else JobStatus.FAILED
-            
-            # 添加到历史记录
-            self._history.append(job)
-            if len(self._history) > self._max_history:
-                self._history.pop(0)
-            
+
+        job.status = _SUCCESS if success else _FAILED
+
+        if not keep_history:
+            # 不留史：任务就此脱离队列，索引是弱引用，随对象回收消失
             return True
+
+        # 添加到历史记录
+        with self._history_lock:
+            evicted = self._history_push(job)
+            self._rebuild_history_view()
+        if evicted is not None:
+            self._evict([evicted])
+
+        return True
     
+    def _history_push(self, job: Job) -> Optional[Job]:
+        """向环形缓冲追加一条历史，返回被覆盖的最旧记录（须持有 _history_lock）"""
+        if self._hist_n < self._max_history:
+            tail = (self._hist_head + self._hist_n) % self._max_history
+            self._history[tail] = job
+            self._hist_n += 1
+            return None
+        evicted = self._history[self._hist_head]
+        self._history[self._hist_head] = job
+        self._hist_head = (self._hist_head + 1) % self._max_history
+        return evicted
+
+    def _rebuild_history_view(self) -> None:
+        """按逻辑序重建只读视图并原子替换（须持有 _history_lock）"""
+        head, n, cap = self._hist_head, self._hist_n, self._max_history
+        self._history_view = tuple(self._history[(head + i) % cap] for i in range(n))
+
+    def _evict(self, evicted: List[Job]) -> None:
+        """注销被淘汰任务的索引并触发回收回调（锁外调用）"""
+        if not evicted:
+            return
+        # 弱引用下多数表项会自行消失，但淘汰的对象可能进对象池复用、
+        # 改头换面后仍然存活，必须显式注销旧 id，避免查到串号的任务
+        with self._index_lock:
+            for old in evicted:
+                self._index.pop(old.id, None)
+        if self.on_evict is not None:
+            for old in evicted:
+                self.on_evict(old)
+
+    def requeue(self, job: Job) -> bool:
+        """把已认领的任务放回等待队列（绑定设备暂不可用、停止回收等场景）
+
+        先从运行表摘除再重新入队，任务不会同时出现在两处。内存水位
+        已满无法回队时置为 FAILED 记入历史，不静默丢弃。
+
+        Returns:
+            是否成功回队；False 表示任务已按失败落史
+        """
+        with self._running_lock:
+            self._running.pop(job.id, None)
+        if self.enqueue(job):
+            return True
+        job.status = _FAILED
+        with self._history_lock:
+            evicted = self._history_push(job)
+            self._rebuild_history_view()
+        if evicted is not None:
+            self._evict([evicted])
+        return False
+
     def retry(self, job_id: str) -> bool:
         """
         重试失败的任务
@@ -88,21 +399,28 @@ class TaskQueue:
         Returns:
             是否成功加入重试队列
         """
-        with self._lock:
+        with self._running_lock:
             if job_id not in self._running:
                 return False
-            
             job = self._running.pop(job_id)
-            
-            if job.retry_count >= job.max_retries:
-                job.status = JobStatus.FAILED
-                self._history.append(job)
-                return False
-            
-            job.retry_count += 1
-            job.status = JobStatus.PENDING
-            self._queue.appendleft(job)  # 优先重试
-            return True
+
+        if job.retry_count >= job.max_retries:
+            job.status = _FAILED
+            with self._history_lock:
+                evicted = self._history_push(job)
+                self._rebuild_history_view()
+            if evicted is not None:
+                self._evict([evicted])
+            return False
+
+        job.retry_count += 1
+        job.status = _PENDING
+        due = time.monotonic() + 2 ** job.retry_count  # 指数退避
+        self._bytes += self._job_bytes(job)
+        with self._retry_lock:
+            heapq.heappush(self._retry_heap, (due, next(self._retry_seq), job))
+        self._pending_n += 1
+        return True
     
     def cancel(self, job_id: str) -> bool:
         """
@@ -114,63 +432,79 @@ class TaskQueue:
         Returns:
             是否成功取消
         """
-        with self._lock:
-            # 从等待队列中取消
-            for i, job in enumerate(self._queue):
-                if job.id == job_id:
-                    job.status = JobStatus.CANCELLED
-                    del self._queue[i]
-                    self._history.append(job)
-                    return True
-            
+        # 先查索引确认存在且处于等待状态，避免白扫一遍队列
+        with self._index_lock:
+            target = self._index.get(job_id)
+        if target is None or target.status is not _PENDING:
             # 运行中的任务不能直接取消
             return False
+
+        with self._pending_lock:
+            if target.status is not _PENDING:
+                return False  # 与出队竞争失败，任务已开始执行
+            # 统一置墓碑：不物理删除，出队时丢弃，O(1) 完成取消
+            target.status = _CANCELLED
+            target.cancelled = True
+            self._pending_n -= 1
+        cancelled = target
+
+        with self._history_lock:
+            evicted = self._history_push(cancelled)
+            self._rebuild_history_view()
+        if evicted is not None:
+            self._evict([evicted])
+        return True
     
-    def list_pending(self) -> List[Job]:
-        """列出等待中的任务"""
-        with self._lock:
-            return list(self._queue)
+    def list_pending(self) -> tuple:
+        """列出等待中的任务（索引按入队顺序，取其中 PENDING 的）
+
+        返回不可变快照（tuple 在 C 层一次构建，持锁时间更短）。
+        """
+        with self._index_lock:
+            return tuple(j for j in self._index.values() if j.status is _PENDING)
     
-    def list_running(self) -> List[Job]:
-        """列出运行中的任务"""
-        with self._lock:
-            return list(self._running.values())
+    def iter_pending_ids(self) -> tuple:
+        """只复制等待中任务的 id，调用方可在锁外逐个 get_job 解析"""
+        with self._index_lock:
+            return tuple(
+                j.id for j in self._index.values() if j.status is _PENDING
+            )
     
-    def list_history(self, limit: int = 20) -> List[Job]:
-        """列出历史任务"""
-        with self._lock:
-            return self._history[-limit:]
+    def list_running(self) -> tuple:
+        """列出运行中的任务（不可变快照）"""
+        with self._running_lock:
+            return tuple(self._running.values())
+    
+    def list_history(self, limit: int = 20) -> tuple:
+        """列出历史任务（不可变快照，从旧到新；无锁读写时复制视图）"""
+        view = self._history_view
+        return view[-limit:] if limit < len(view) else view
     
     def get_job(self, job_id: str) -> Optional[Job]:
         """获取任务信息"""
-        with self._lock:
-            # 先找运行中的
-            if job_id in self._running:
-                return self._running[job_id]
-            
-            # 再找等待中的
-            for job in self._queue:
-                if job.id == job_id:
-                    return job
-            
-            # 最后找历史
-            for job in self._history:
-                if job.id == job_id:
-                    return job
-            
-            return None
+        # 等待/运行/历史窗口内的任务都在索引里，O(1) 命中
+        with self._index_lock:
+            return self._index.get(job_id)
     
+    @property
+    def bytes_enqueued(self) -> int:
+        """等待队列的粗略内存占用（字节，瞬时快照）"""
+        return self._bytes
+
+    @property
+    def byte_limit(self) -> int:
+        """入队内存高水位（字节）"""
+        return self._byte_limit
+
     @property
     def pending_count(self) -> int:
-        """等待中的任务数量"""
-        with self._lock:
-            return len(self._queue)
+        """等待中的任务数量（瞬时快照；读一个 int 在 GIL 下本身原子）"""
+        return self._pending_n
     
     @property
     def running_count(self) -> int:
-        """运行中的任务数量"""
-        with self._lock:
-            return len(self._running)
+        """运行中的任务数量（瞬时快照；len 在 GIL 下本身原子，无需加锁）"""
+        return len(self._running)
     
     def clear(self) -> int:
         """
@@ -179,10 +513,112 @@ class TaskQueue:
         Returns:
             清空的任务数量
         """
-        with self._lock:
-            count = len(self._queue)
-            for job in self._queue:
-                job.status = JobStatus.CANCELLED
+        cancelled = []
+        with self._retry_lock:
+            for _, _, job in self._retry_heap:
+                self._bytes -= self._job_bytes(job)
+                if job.status is _PENDING:
+                    cancelled.append(job)
+            self._retry_heap.clear()
+        with self._pending_lock:
+            # 全局队列就地排空（_pop_fast 会重入 _pending_lock 认领，
+            # 这里已持锁，直接判状态即可，与取消/出队互斥）
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._bytes -= self._job_bytes(job)
+                if not job.cancelled and job.status is _PENDING:
+                    cancelled.append(job)
+            for shard in self._pinned.values():
+                for j in shard:
+                    self._bytes -= self._job_bytes(j)
+                    if not j.cancelled:
+                        cancelled.append(j)
+            self._pinned.clear()
+            self._pending_n = 0
+        for job in cancelled:
+            job.status = _CANCELLED
+        all_evicted = []
+        with self._history_lock:
+            for job in cancelled:
+                evicted = self._history_push(job)
+                if evicted is not None:
+                    all_evicted.append(evicted)
+            self._rebuild_history_view()
+        self._evict(all_evicted)
+        return len(cancelled)
+
+
+class AsyncTaskQueue:
+    """任务队列的 asyncio 版本：单事件循环内使用，天然无锁
+
+    供 FastAPI/uvicorn 等异步部署直接在事件循环里消费任务：
+    enqueue 同步可调（put_nowait），工作协程 await dequeue() 挂起
+    等待而不是轮询。所有结构只被一个事件循环访问，不需要任何锁。
+    跨线程投递请用线程安全的 TaskQueue。
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._running: dict[str, Job] = {}
+        self._history: deque = deque(maxlen=100)
+        self._index: WeakValueDictionary = WeakValueDictionary()
+
+    def enqueue(self, job: Job) -> None:
+        """任务入队（同步接口，协程与回调中皆可调用）"""
+        self._index[job.id] = job
+        job.status = _PENDING
+        self._queue.put_nowait(job)
+
+    async def dequeue(self) -> Job:
+        """取出一个任务，队列为空时挂起等待；被取消的墓碑直接丢弃"""
+        while True:
+            job = await self._queue.get()
+            if job.status is not _PENDING:
                 self._history.append(job)
-            self._queue.clear()
-            return count
+                continue
+            job.status = _RUNNING
+            self._running[job.id] = job
+            return job
+
+    def complete(self, job_id: str, success: bool) -> bool:
+        """标记任务完成"""
+        job = self._running.pop(job_id, None)
+        if job is None:
+            return False
+        job.status = _SUCCESS if success else _FAILED
+        self._history.append(job)
+        return True
+
+    def cancel(self, job_id: str) -> bool:
+        """取消等待中的任务（置墓碑，O(1)）"""
+        job = self._index.get(job_id)
+        if job is None or job.status is not _PENDING:
+            return False
+        job.status = _CANCELLED
+        return True
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """获取任务信息"""
+        return self._index.get(job_id)
+
+    @property
+    def pending_count(self) -> int:
+        """等待中的任务数量"""
+        return self._queue.qsize()
+
+    @property
+    def running_count(self) -> int:
+        """运行中的任务数量"""
+        return len(self._running)
+
+    def list_running(self) -> tuple:
+        """列出运行中的任务"""
+        return tuple(self._running.values())
+
+    def list_history(self, limit: int = 20) -> tuple:
+        """列出历史任务"""
+        n = len(self._history)
+        return tuple(self._history)[max(0, n - limit):]
@@ -7,6 +7,17 @@
 
 from autoglm_scheduler import Scheduler
 
+# 签到任务在启动时就完全确定，抽成静态表：注册是一个循环，
+# cron 表达式在调度器内是带缓存的一次性解析，触发路径上零解析开销
+CHECKIN_JOBS = [
+    # (名称, 任务描述, cron)
+    ("微博签到", "打开微博，找到签到入口完成每日签到", "0 8 * * *"),
+    ("京东签到", "打开京东APP，完成签到任务领取京豆", "30 8 * * *"),
+    ("淘宝签到", "打开淘宝，进入领金币页面完成签到", "0 9 * * *"),
+    ("美团签到", "打开美团APP，完成每日签到", "0 12 * * *"),
+    ("B站签到", "打开bilibili，完成每日签到任务", "0 18 * * *"),
+]
+
 
 def main():
     # 创建调度器
@@ -29,40 +40,8 @@ def main():
     
     # ==================== 添加定时签到任务 ====================
     
-    # 微博签到 - 每天早上8点
-    scheduler.add_cron_job(
-        name="微博签到",
-        task="打开微博，找到签到入口完成每日签到",
-        cron="0 8 * * *",
-    )
-    
-    # 京东签到领京豆 - 每天早上8:30
-    scheduler.add_cron_job(
-        name="京东签到",
-        task="打开京东APP，完成签到任务领取京豆",
-        cron="30 8 * * *",
-    )
-    
-    # 淘宝签到领金币 - 每天早上9点
-    scheduler.add_cron_job(
-        name="淘宝签到",
-        task="打开淘宝，进入领金币页面完成签到",
-        cron="0 9 * * *",
-    )
-    
-    # 美团签到 - 每天中午12点
-    scheduler.add_cron_job(
-        name="美团签到",
-        task="打开美团APP，完成每日签到",
-        cron="0 12 * * *",
-    )
-    
-    # B站签到 - 每天下午6点
-    scheduler.add_cron_job(
-        name="B站签到",
-        task="打开bilibili，完成每日签到任务",
-        cron="0 18 * * *",
-    )
+    for name, task, cron in CHECKIN_JOBS:
+        scheduler.add_cron_job(name=name, task=task, cron=cron)
     
     # ==================== 设置任务完成回调 ====================
     
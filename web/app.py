@@ -1,23 +1,130 @@
 """Web 监控界面"""
 
+import asyncio
+import gzip
+import hashlib
+import os
+import queue
+import time
+from pathlib import Path
+from operator import attrgetter
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+import orjson
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 import uvicorn
 
 from autoglm_scheduler import Scheduler
 
 
-app = FastAPI(title="AutoGLM-Scheduler", description="多设备定时任务调度器")
+# 内部面板用不上 /docs、/redoc 和 OpenAPI schema：默认禁用，省掉
+# 启动时全量路由签名内省 + Pydantic schema 生成和三条额外路由；
+# 开发调试设 AUTOGLM_DEV=1 重新打开
+_DEV = bool(os.getenv("AUTOGLM_DEV"))
+
+# orjson 已是核心依赖（config 模块同款），API 响应统一走 Rust 实现的
+# 序列化，轮询端点的字典列表不再经过纯 Python 的 json 遍历
+app = FastAPI(
+    title="AutoGLM-Scheduler",
+    description="多设备定时任务调度器",
+    default_response_class=ORJSONResponse,
+    docs_url="/docs" if _DEV else None,
+    redoc_url="/redoc" if _DEV else None,
+    openapi_url="/openapi.json" if _DEV else None,
+)
+# 轮询 JSON 随设备/任务数膨胀，统一压缩；compresslevel=5 在压缩比和
+# CPU 之间取平衡，小于 512 字节的响应不值得压
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+app.mount(
+    "/static",
+    StaticFiles(directory=str(Path(__file__).parent / "static")),
+    name="static",
+)
 
 # 全局调度器实例
 scheduler: Optional[Scheduler] = None
 
 
+class _SWRCache:
+    """stale-while-revalidate 缓存
+
+    面板每 3 秒轮询一轮，每个打开的标签页都会触发一次完整的状态遍历
+    和序列化。这里按端点键缓存序列化好的字节：ttl 内直接命中；过期但
+    在 stale_ttl 内先返回陈值、后台任务刷新，把热路径的状态遍历封顶
+    到每端点约 1 次/秒，与客户端数量无关。
+    """
+
+    def __init__(self):
+        self._entries: dict = {}  # key -> (fresh_until, stale_until, value)
+        self._refreshing: set = set()
+
+    def get_or_set_swr(
+        self,
+        key: str,
+        factory: Callable[[], bytes],
+        ttl: float = 1.0,
+        stale_ttl: float = 5.0,
+    ) -> bytes:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            fresh_until, stale_until, value = entry
+            if now < fresh_until:
+                return value
+            if now < stale_until:
+                # 陈值仍可用：立即返回，后台刷新，调用方不付重算延迟
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    asyncio.get_running_loop().call_soon(
+                        self._refresh, key, factory, ttl, stale_ttl
+                    )
+                return value
+        # 无缓存或彻底过期：同步重算
+        value = factory()
+        self._entries[key] = (now + ttl, now + ttl + stale_ttl, value)
+        return value
+
+    def _refresh(self, key: str, factory: Callable[[], bytes],
+                 ttl: float, stale_ttl: float) -> None:
+        try:
+            now = time.monotonic()
+            self._entries[key] = (now + ttl, now + ttl + stale_ttl, factory())
+        finally:
+            self._refreshing.discard(key)
+
+
+def require_scheduler() -> Scheduler:
+    """依赖注入：调度器未初始化时直接 503 短路，处理函数不再逐个判空"""
+    if scheduler is None:
+        raise HTTPException(status_code=503, detail="调度器未初始化")
+    return scheduler
+
+
+_cache = _SWRCache()
+
+# 属性批量抽取：一次 C 层 attrgetter 调用代替每元素 5 次 LOAD_ATTR
+_DEV_GET = attrgetter(
+    "device_id", "status", "current_job_id", "total_jobs", "success_rate"
+)
+_CRON_GET = attrgetter("id", "name", "next_run_time")
+_fmt_rate = "{:.1f}%".format
+
+# 成功率格式化是逐设备的解释器循环，大机群下可观；装有 numpy 时改走
+# C 层数组运算（可选依赖，未安装保持纯 Python 路径）
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+# numpy 有固定的调度开销，设备数低于该阈值时纯 Python 格式化更快
+_NP_MIN_DEVICES = 32
+
+
 def init_scheduler(
     base_url: str = "http://localhost:8000/v1",
     api_key: str = "EMPTY",
@@ -36,474 +143,269 @@ def init_scheduler(
 
 # ==================== API 路由 ====================
 
-@app.get("/", response_class=HTMLResponse)
+@app.get("/")
 async def index(request: Request):
-    """首页"""
-    return get_dashboard_html()
+    """首页
+
+    页面在模块加载时编码为字节常量，请求路径只剩一次缓冲区拷贝；
+    带 ETag 协商缓存，轮询标签页的二次加载直接 304。
+    """
+    if request.headers.get("if-none-match") == _DASHBOARD_ETAG:
+        return Response(status_code=304)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        # 页面的压缩结果启动时算好，绕过中间件的每请求压缩
+        return Response(
+            _DASHBOARD_GZ,
+            media_type="text/html; charset=utf-8",
+            headers={
+                "Content-Encoding": "gzip",
+                "ETag": _DASHBOARD_ETAG,
+                "Cache-Control": "public, max-age=60",
+            },
+        )
+    return Response(
+        _DASHBOARD_BYTES,
+        media_type="text/html; charset=utf-8",
+        headers={"ETag": _DASHBOARD_ETAG, "Cache-Control": "public, max-age=60"},
+    )
 
 
-@app.get("/api/status")
-async def get_status():
-    """获取调度器状态"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    return scheduler.status
+def _devices_data(devices) -> list:
+    rows = list(map(_DEV_GET, devices))
+    if _np is not None and len(rows) > _NP_MIN_DEVICES:
+        # 成功率整列进 numpy：取整、转字符串、拼 % 都是一次数组操作，
+        # tolist() 一次性换回 Python str，循环里不再有逐元素格式化
+        rates = _np.fromiter(
+            (row[4] for row in rows), dtype=_np.float32, count=len(rows)
+        )
+        rates_s = _np.char.add(
+            _np.round(rates * 100, 1).astype("U5"), "%"
+        ).tolist()
+        return [
+            {
+                "device_id": device_id,
+                "status": status.value,
+                "current_job_id": current_job_id,
+                "total_jobs": total_jobs,
+                "success_rate": rate_s,
+            }
+            for (device_id, status, current_job_id, total_jobs, _), rate_s
+            in zip(rows, rates_s)
+        ]
+    return [
+        {
+            "device_id": device_id,
+            "status": status.value,
+            "current_job_id": current_job_id,
+            "total_jobs": total_jobs,
+            "success_rate": _fmt_rate(success_rate * 100),
+        }
+        for device_id, status, current_job_id, total_jobs, success_rate
+        in rows
+    ]
 
 
-@app.get("/api/devices")
-async def get_devices():
-    """获取设备列表"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    
-    devices = scheduler.list_devices()
+def _cron_data(cron_jobs) -> list:
     return [
         {
-            "device_id": d.device_id,
-            "status": d.status.value,
-            "current_job_id": d.current_job_id,
-            "total_jobs": d.total_jobs,
-            "success_rate": f"{d.success_rate * 100:.1f}%",
+            "id": job_id,
+            "name": name,
+            "next_run": next_run,  # orjson 原生序列化 datetime
         }
-        for d in devices
+        for job_id, name, next_run in map(_CRON_GET, cron_jobs)
     ]
 
 
-@app.post("/api/devices/{device_id}")
-async def add_device(device_id: str):
-    """添加设备"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    
-    success = scheduler.add_device(device_id)
+def _status_payload() -> bytes:
+    return orjson.dumps(scheduler.status)
+
+
+def _devices_payload() -> bytes:
+    return orjson.dumps(_devices_data(scheduler.list_devices()))
+
+
+def _pending_payload() -> bytes:
+    return orjson.dumps([j.to_dict() for j in scheduler.list_pending_jobs()])
+
+
+def _running_payload() -> bytes:
+    return orjson.dumps([j.to_dict() for j in scheduler.list_running_jobs()])
+
+
+def _history_payload(limit: int) -> bytes:
+    return orjson.dumps([j.to_dict() for j in scheduler.list_history(limit)])
+
+
+def _cron_payload() -> bytes:
+    return orjson.dumps(_cron_data(scheduler.list_cron_jobs()))
+
+
+def _snapshot_payload(history_limit: int) -> bytes:
+    """五个轮询载荷合成一份，一次请求刷新整个面板
+
+    状态采集走 Scheduler.current_snapshot()：状态没变时是一次无锁的
+    指针读，变了才逐组件单次加锁重建；各卡片的数据出自同一轮采样。
+    缓存的字典是共享只读的，这里组装新字典而不原地改写。
+    """
+    snap = scheduler.current_snapshot(history_limit)
+    return orjson.dumps({
+        "status": snap["status"],
+        "devices": _devices_data(snap["devices"]),
+        "cron": _cron_data(snap["cron"]),
+        "running": [j.to_dict() for j in snap["running"]],
+        "history": [j.to_dict() for j in snap["history"]],
+    })
+
+
+def _json(cached: bytes) -> Response:
+    return Response(cached, media_type="application/json")
+
+
+@app.get("/api/status")
+async def get_status(sched: Scheduler = Depends(require_scheduler)):
+    """获取调度器状态"""
+    return _json(_cache.get_or_set_swr("status", _status_payload))
+
+
+@app.get("/api/devices")
+async def get_devices(sched: Scheduler = Depends(require_scheduler)):
+    """获取设备列表"""
+    return _json(_cache.get_or_set_swr("devices", _devices_payload))
+
+
+@app.post("/api/devices/{device_id}", response_class=ORJSONResponse)
+async def add_device(device_id: str, sched: Scheduler = Depends(require_scheduler)):
+    """添加设备
+
+    在线探测可能等 adb 最多 2 秒，放线程池执行，不挂起事件循环。
+    """
+    success = await asyncio.to_thread(sched.add_device, device_id)
     return {"success": success}
 
 
-@app.delete("/api/devices/{device_id}")
-async def remove_device(device_id: str):
+@app.delete("/api/devices/{device_id}", response_class=ORJSONResponse)
+async def remove_device(device_id: str, sched: Scheduler = Depends(require_scheduler)):
     """移除设备"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    
-    success = scheduler.remove_device(device_id)
+    success = sched.remove_device(device_id)
     return {"success": success}
 
 
+@app.get("/api/snapshot")
+async def get_snapshot(history_limit: int = 10,
+                       sched: Scheduler = Depends(require_scheduler)):
+    """面板一次性快照：状态 + 设备 + 定时/运行中/历史任务
+
+    轮询方请求一次即可刷新全部卡片，省掉 5 次 HTTP 往返和
+    中间件穿越。
+    """
+    return _json(_cache.get_or_set_swr(
+        f"snapshot:{history_limit}", lambda: _snapshot_payload(history_limit)
+    ))
+
+
+@app.get("/api/events")
+async def events(history_limit: int = 10,
+                 sched: Scheduler = Depends(require_scheduler)):
+    """SSE 推送：状态变更时下发快照，空闲时每 5 秒心跳一次
+
+    用 text/event-stream 长连接取代定时轮询：没有变更就没有请求，
+    突发变更在等待间隙自动合并成一次推送。
+    """
+    async def gen():
+        q = sched.subscribe()
+        try:
+            while True:
+                try:
+                    # 在线程池里阻塞等事件，5 秒超时充当心跳
+                    await asyncio.to_thread(q.get, True, 5.0)
+                    while True:  # 合并积压的变更标记
+                        try:
+                            q.get_nowait()
+                        except queue.Empty:
+                            break
+                except queue.Empty:
+                    pass  # 心跳：无变更也推一帧，兼作连接保活
+                yield b"data: " + _snapshot_payload(history_limit) + b"\n\n"
+        finally:
+            sched.unsubscribe(q)
+
+    return StreamingResponse(gen(), media_type="text/event-stream")
+
+
 @app.get("/api/jobs/pending")
-async def get_pending_jobs():
+async def get_pending_jobs(sched: Scheduler = Depends(require_scheduler)):
     """获取待执行任务"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    
-    jobs = scheduler.list_pending_jobs()
-    return [j.to_dict() for j in jobs]
+    return _json(_cache.get_or_set_swr("jobs:pending", _pending_payload))
 
 
 @app.get("/api/jobs/running")
-async def get_running_jobs():
+async def get_running_jobs(sched: Scheduler = Depends(require_scheduler)):
     """获取运行中任务"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    
-    jobs = scheduler.list_running_jobs()
-    return [j.to_dict() for j in jobs]
+    return _json(_cache.get_or_set_swr("jobs:running", _running_payload))
 
 
 @app.get("/api/jobs/history")
-async def get_history(limit: int = 20):
+async def get_history(limit: int = 20,
+                      sched: Scheduler = Depends(require_scheduler)):
     """获取历史任务"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    
-    jobs = scheduler.list_history(limit)
-    return [j.to_dict() for j in jobs]
+    return _json(_cache.get_or_set_swr(
+        f"jobs:history:{limit}", lambda: _history_payload(limit)
+    ))
 
 
 @app.get("/api/jobs/cron")
-async def get_cron_jobs():
+async def get_cron_jobs(sched: Scheduler = Depends(require_scheduler)):
     """获取定时任务"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    
-    jobs = scheduler.list_cron_jobs()
-    return [
-        {
-            "id": j.id,
-            "name": j.name,
-            "next_run": str(j.next_run_time) if j.next_run_time else None,
-        }
-        for j in jobs
-    ]
+    return _json(_cache.get_or_set_swr("jobs:cron", _cron_payload))
 
 
-@app.post("/api/jobs")
-async def add_job(name: str, task: str, cron: Optional[str] = None, device_id: Optional[str] = None):
+@app.post("/api/jobs", response_class=ORJSONResponse)
+async def add_job(name: str, task: str, cron: Optional[str] = None,
+                  device_id: Optional[str] = None,
+                  sched: Scheduler = Depends(require_scheduler)):
     """添加任务"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    
     if cron:
-        job_id = scheduler.add_cron_job(name, task, cron, device_id)
+        job_id = sched.add_cron_job(name, task, cron, device_id)
     else:
-        job_id = scheduler.add_job(name, task, device_id)
+        job_id = sched.add_job(name, task, device_id)
     
     return {"job_id": job_id}
 
 
-@app.delete("/api/jobs/{job_id}")
-async def cancel_job(job_id: str):
+@app.delete("/api/jobs/{job_id}", response_class=ORJSONResponse)
+async def cancel_job(job_id: str, sched: Scheduler = Depends(require_scheduler)):
     """取消任务"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    
-    success = scheduler.cancel_job(job_id)
+    success = sched.cancel_job(job_id)
     return {"success": success}
 
 
-@app.post("/api/start")
-async def start_scheduler():
-    """启动调度器"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    
-    scheduler.start(blocking=False)
+@app.post("/api/start", response_class=ORJSONResponse)
+async def start_scheduler(sched: Scheduler = Depends(require_scheduler)):
+    """启动调度器（APScheduler 启动放线程池，不占事件循环）"""
+    await asyncio.to_thread(sched.start, False)
     return {"success": True}
 
 
-@app.post("/api/stop")
-async def stop_scheduler():
-    """停止调度器"""
-    if scheduler is None:
-        return {"error": "调度器未初始化"}
-    
-    scheduler.stop()
+@app.post("/api/stop", response_class=ORJSONResponse)
+async def stop_scheduler(sched: Scheduler = Depends(require_scheduler)):
+    """停止调度器
+
+    要逐个 join 工作线程（最长 5 秒/个），必须离开事件循环执行，
+    否则停止期间整个面板无响应。
+    """
+    await asyncio.to_thread(sched.stop)
     return {"success": True}
 
 
 # ==================== HTML 模板 ====================
 
-def get_dashboard_html() -> str:
-    """返回仪表盘HTML"""
-    return """
-<!DOCTYPE html>
-<html lang="zh">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>AutoGLM-Scheduler</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <script src="https://unpkg.com/lucide@latest"></script>
-    <style>
-        .card { @apply bg-white rounded-lg shadow-md p-6; }
-        .btn { @apply px-4 py-2 rounded-lg font-medium transition-colors; }
-        .btn-primary { @apply bg-blue-600 text-white hover:bg-blue-700; }
-        .btn-danger { @apply bg-red-600 text-white hover:bg-red-700; }
-        .btn-success { @apply bg-green-600 text-white hover:bg-green-700; }
-        .status-idle { @apply text-green-600; }
-        .status-busy { @apply text-yellow-600; }
-        .status-offline { @apply text-gray-400; }
-    </style>
-</head>
-<body class="bg-gray-100 min-h-screen">
-    <div class="container mx-auto px-4 py-8">
-        <!-- Header -->
-        <div class="flex items-center justify-between mb-8">
-            <div>
-                <h1 class="text-3xl font-bold text-gray-800">AutoGLM-Scheduler</h1>
-                <p class="text-gray-600">多设备定时任务调度器</p>
-            </div>
-            <div class="flex gap-4">
-                <button onclick="startScheduler()" class="btn btn-success flex items-center gap-2">
-                    <i data-lucide="play" class="w-4 h-4"></i> 启动
-                </button>
-                <button onclick="stopScheduler()" class="btn btn-danger flex items-center gap-2">
-                    <i data-lucide="square" class="w-4 h-4"></i> 停止
-                </button>
-            </div>
-        </div>
-        
-        <!-- Status Cards -->
-        <div class="grid grid-cols-1 md:grid-cols-4 gap-6 mb-8">
-            <div class="card">
-                <div class="flex items-center justify-between">
-                    <div>
-                        <p class="text-gray-500 text-sm">设备总数</p>
-                        <p id="total-devices" class="text-3xl font-bold text-gray-800">0</p>
-                    </div>
-                    <i data-lucide="smartphone" class="w-10 h-10 text-blue-600"></i>
-                </div>
-            </div>
-            <div class="card">
-                <div class="flex items-center justify-between">
-                    <div>
-                        <p class="text-gray-500 text-sm">空闲设备</p>
-                        <p id="idle-devices" class="text-3xl font-bold text-green-600">0</p>
-                    </div>
-                    <i data-lucide="check-circle" class="w-10 h-10 text-green-600"></i>
-                </div>
-            </div>
-            <div class="card">
-                <div class="flex items-center justify-between">
-                    <div>
-                        <p class="text-gray-500 text-sm">等待任务</p>
-                        <p id="pending-jobs" class="text-3xl font-bold text-yellow-600">0</p>
-                    </div>
-                    <i data-lucide="clock" class="w-10 h-10 text-yellow-600"></i>
-                </div>
-            </div>
-            <div class="card">
-                <div class="flex items-center justify-between">
-                    <div>
-                        <p class="text-gray-500 text-sm">运行中</p>
-                        <p id="running-jobs" class="text-3xl font-bold text-blue-600">0</p>
-                    </div>
-                    <i data-lucide="loader" class="w-10 h-10 text-blue-600 animate-spin"></i>
-                </div>
-            </div>
-        </div>
-        
-        <!-- Main Content -->
-        <div class="grid grid-cols-1 lg:grid-cols-2 gap-6">
-            <!-- Devices -->
-            <div class="card">
-                <div class="flex items-center justify-between mb-4">
-                    <h2 class="text-xl font-bold text-gray-800">设备列表</h2>
-                    <button onclick="showAddDevice()" class="btn btn-primary text-sm">
-                        <i data-lucide="plus" class="w-4 h-4 inline"></i> 添加设备
-                    </button>
-                </div>
-                <div id="devices-list" class="space-y-3">
-                    <!-- 动态填充 -->
-                </div>
-            </div>
-            
-            <!-- Cron Jobs -->
-            <div class="card">
-                <div class="flex items-center justify-between mb-4">
-                    <h2 class="text-xl font-bold text-gray-800">定时任务</h2>
-                    <button onclick="showAddJob()" class="btn btn-primary text-sm">
-                        <i data-lucide="plus" class="w-4 h-4 inline"></i> 添加任务
-                    </button>
-                </div>
-                <div id="cron-jobs-list" class="space-y-3">
-                    <!-- 动态填充 -->
-                </div>
-            </div>
-            
-            <!-- Running Jobs -->
-            <div class="card">
-                <h2 class="text-xl font-bold text-gray-800 mb-4">运行中的任务</h2>
-                <div id="running-jobs-list" class="space-y-3">
-                    <!-- 动态填充 -->
-                </div>
-            </div>
-            
-            <!-- History -->
-            <div class="card">
-                <h2 class="text-xl font-bold text-gray-800 mb-4">执行历史</h2>
-                <div id="history-list" class="space-y-3 max-h-96 overflow-y-auto">
-                    <!-- 动态填充 -->
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <!-- Add Device Modal -->
-    <div id="add-device-modal" class="fixed inset-0 bg-black bg-opacity-50 hidden items-center justify-center">
-        <div class="bg-white rounded-lg p-6 w-96">
-            <h3 class="text-xl font-bold mb-4">添加设备</h3>
-            <input id="device-id-input" type="text" placeholder="设备ID (如 emulator-5554)" 
-                   class="w-full px-4 py-2 border rounded-lg mb-4">
-            <div class="flex justify-end gap-2">
-                <button onclick="hideAddDevice()" class="btn bg-gray-200 hover:bg-gray-300">取消</button>
-                <button onclick="addDevice()" class="btn btn-primary">添加</button>
-            </div>
-        </div>
-    </div>
-    
-    <!-- Add Job Modal -->
-    <div id="add-job-modal" class="fixed inset-0 bg-black bg-opacity-50 hidden items-center justify-center">
-        <div class="bg-white rounded-lg p-6 w-96">
-            <h3 class="text-xl font-bold mb-4">添加任务</h3>
-            <input id="job-name-input" type="text" placeholder="任务名称" 
-                   class="w-full px-4 py-2 border rounded-lg mb-3">
-            <textarea id="job-task-input" placeholder="任务描述（发给AI的指令）" 
-                      class="w-full px-4 py-2 border rounded-lg mb-3" rows="3"></textarea>
-            <input id="job-cron-input" type="text" placeholder="Cron表达式 (如 0 8 * * *，留空则立即执行)" 
-                   class="w-full px-4 py-2 border rounded-lg mb-4">
-            <div class="flex justify-end gap-2">
-                <button onclick="hideAddJob()" class="btn bg-gray-200 hover:bg-gray-300">取消</button>
-                <button onclick="addJob()" class="btn btn-primary">添加</button>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        // 初始化 Lucide 图标
-        lucide.createIcons();
-        
-        // 刷新数据
-        async function refresh() {
-            try {
-                // 状态
-                const status = await fetch('/api/status').then(r => r.json());
-                if (!status.error) {
-                    document.getElementById('total-devices').textContent = status.devices?.total || 0;
-                    document.getElementById('idle-devices').textContent = status.devices?.idle || 0;
-                    document.getElementById('pending-jobs').textContent = status.jobs?.pending || 0;
-                    document.getElementById('running-jobs').textContent = status.jobs?.running || 0;
-                }
-                
-                // 设备列表
-                const devices = await fetch('/api/devices').then(r => r.json());
-                if (!devices.error) {
-                    const html = devices.map(d => `
-                        <div class="flex items-center justify-between p-3 bg-gray-50 rounded-lg">
-                            <div class="flex items-center gap-3">
-                                <i data-lucide="smartphone" class="w-5 h-5 status-${d.status}"></i>
-                                <div>
-                                    <p class="font-medium">${d.device_id}</p>
-                                    <p class="text-sm text-gray-500">成功率: ${d.success_rate}</p>
-                                </div>
-                            </div>
-                            <span class="px-2 py-1 text-xs rounded-full ${
-                                d.status === 'idle' ? 'bg-green-100 text-green-800' :
-                                d.status === 'busy' ? 'bg-yellow-100 text-yellow-800' :
-                                'bg-gray-100 text-gray-800'
-                            }">${d.status}</span>
-                        </div>
-                    `).join('') || '<p class="text-gray-500 text-center">暂无设备</p>';
-                    document.getElementById('devices-list').innerHTML = html;
-                }
-                
-                // 定时任务
-                const cronJobs = await fetch('/api/jobs/cron').then(r => r.json());
-                if (!cronJobs.error) {
-                    const html = cronJobs.map(j => `
-                        <div class="flex items-center justify-between p-3 bg-gray-50 rounded-lg">
-                            <div>
-                                <p class="font-medium">${j.name}</p>
-                                <p class="text-sm text-gray-500">下次: ${j.next_run || '-'}</p>
-                            </div>
-                            <button onclick="removeJob('${j.id}')" class="text-red-600 hover:text-red-800">
-                                <i data-lucide="trash-2" class="w-4 h-4"></i>
-                            </button>
-                        </div>
-                    `).join('') || '<p class="text-gray-500 text-center">暂无定时任务</p>';
-                    document.getElementById('cron-jobs-list').innerHTML = html;
-                }
-                
-                // 运行中任务
-                const running = await fetch('/api/jobs/running').then(r => r.json());
-                if (!running.error) {
-                    const html = running.map(j => `
-                        <div class="p-3 bg-blue-50 rounded-lg">
-                            <div class="flex items-center gap-2">
-                                <i data-lucide="loader" class="w-4 h-4 animate-spin text-blue-600"></i>
-                                <span class="font-medium">${j.name}</span>
-                            </div>
-                            <p class="text-sm text-gray-600 mt-1">${j.task}</p>
-                        </div>
-                    `).join('') || '<p class="text-gray-500 text-center">暂无运行中任务</p>';
-                    document.getElementById('running-jobs-list').innerHTML = html;
-                }
-                
-                // 历史
-                const history = await fetch('/api/jobs/history?limit=10').then(r => r.json());
-                if (!history.error) {
-                    const html = history.map(j => `
-                        <div class="flex items-center justify-between p-3 bg-gray-50 rounded-lg">
-                            <div class="flex items-center gap-2">
-                                <i data-lucide="${j.status === 'success' ? 'check-circle' : 'x-circle'}" 
-                                   class="w-4 h-4 ${j.status === 'success' ? 'text-green-600' : 'text-red-600'}"></i>
-                                <span>${j.name}</span>
-                            </div>
-                            <span class="text-sm text-gray-500">${j.status}</span>
-                        </div>
-                    `).join('') || '<p class="text-gray-500 text-center">暂无历史记录</p>';
-                    document.getElementById('history-list').innerHTML = html;
-                }
-                
-                lucide.createIcons();
-            } catch (e) {
-                console.error('刷新失败:', e);
-            }
-        }
-        
-        // 启动/停止
-        async function startScheduler() {
-            await fetch('/api/start', { method: 'POST' });
-            refresh();
-        }
-        
-        async function stopScheduler() {
-            await fetch('/api/stop', { method: 'POST' });
-            refresh();
-        }
-        
-        // 设备
-        function showAddDevice() {
-            document.getElementById('add-device-modal').classList.remove('hidden');
-            document.getElementById('add-device-modal').classList.add('flex');
-        }
-        
-        function hideAddDevice() {
-            document.getElementById('add-device-modal').classList.add('hidden');
-            document.getElementById('add-device-modal').classList.remove('flex');
-        }
-        
-        async function addDevice() {
-            const deviceId = document.getElementById('device-id-input').value.trim();
-            if (!deviceId) return;
-            
-            await fetch(`/api/devices/${encodeURIComponent(deviceId)}`, { method: 'POST' });
-            document.getElementById('device-id-input').value = '';
-            hideAddDevice();
-            refresh();
-        }
-        
-        // 任务
-        function showAddJob() {
-            document.getElementById('add-job-modal').classList.remove('hidden');
-            document.getElementById('add-job-modal').classList.add('flex');
-        }
-        
-        function hideAddJob() {
-            document.getElementById('add-job-modal').classList.add('hidden');
-            document.getElementById('add-job-modal').classList.remove('flex');
-        }
-        
-        async function addJob() {
-            const name = document.getElementById('job-name-input').value.trim();
-            const task = document.getElementById('job-task-input').value.trim();
-            const cron = document.getElementById('job-cron-input').value.trim();
-            
-            if (!name || !task) return;
-            
-            const params = new URLSearchParams({ name, task });
-            if (cron) params.append('cron', cron);
-            
-            await fetch(`/api/jobs?${params}`, { method: 'POST' });
-            
-            document.getElementById('job-name-input').value = '';
-            document.getElementById('job-task-input').value = '';
-            document.getElementById('job-cron-input').value = '';
-            hideAddJob();
-            refresh();
-        }
-        
-        async function removeJob(jobId) {
-            await fetch(`/api/jobs/${jobId}`, { method: 'DELETE' });
-            refresh();
-        }
-        
-        // 初始化
-        refresh();
-        setInterval(refresh, 3000);  // 每3秒刷新
-    </script>
-</body>
-</html>
-"""
+# 页面拆到 web/static/index.html 单独维护，改样式不再动 Python 源；
+# 启动时读进内存并算好 ETag/gzip——页面只有几 KB，常驻内存直接发比
+# 每请求 sendfile 更省
+_STATIC_DIR = Path(__file__).parent / "static"
+_DASHBOARD_BYTES = (_STATIC_DIR / "index.html").read_bytes()
+_DASHBOARD_ETAG = hashlib.md5(_DASHBOARD_BYTES).hexdigest()
+_DASHBOARD_GZ = gzip.compress(_DASHBOARD_BYTES, 6)
 
 
 def run_web(
@@ -513,10 +415,43 @@ def run_web(
     api_key: str = "EMPTY",
     model: str = "autoglm-phone-9b",
 ):
-    """启动 Web 服务"""
+    """启动 Web 服务
+
+    刻意单进程：Scheduler 的工作线程、设备池和活动 Job 对象都住在
+    本进程里，uvicorn 多 worker 会把它们复制成 N 份互不相干的调度器。
+    读侧扩展靠 SSE 推送 + RCU 快照缓存（读请求已近零成本），不靠加
+    进程。
+    """
     init_scheduler(base_url, api_key, model)
     print(f"🌐 Web 界面已启动: http://localhost:{port}")
-    uvicorn.run(app, host=host, port=port)
+    # 装有 uvloop/httptools（uvicorn[standard]）时换掉标准库事件循环和
+    # 纯 Python 的 h11 解析器；Windows（雷电模拟器环境）没有 uvloop，
+    # 回退 auto
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "auto"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "auto"
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        loop=loop,
+        http=http,
+        # 面板以长连接（SSE/轮询复用）为主：keep-alive 放宽到 30 秒，
+        # 访问日志和 Server/Date 头这些每请求的固定开销全部关掉
+        timeout_keep_alive=30,
+        access_log=False,
+        log_level="warning",
+        proxy_headers=False,
+        server_header=False,
+        date_header=False,
+    )
 
 
 if __name__ == "__main__":